@@ -1,22 +1,27 @@
-from dotenv import load_dotenv
+import functools
+import itertools
 import os
 import time
 import streamlit as st
-import fitz  # PyMuPDF
-import google.generativeai as genai
-import re
 from datetime import datetime
 import uuid
 import json
-import base64
-from docx import Document
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-import tempfile
-
-# Load environment variables and configure Gemini
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+from batch import CallBudget, iter_pdf_uploads, run_bounded
+from scoring import score_resume, score_resumes
+from extraction import ExtractionError
+from caching import content_digest, response_cache_key
+from exports import EXPORT_FORMATS, cached_export
+from core import (
+    ANALYSIS_LABELS, AUTO_MODEL, JOB_LIBRARY_ADMIN_KEY, LOCAL_SCORING_KEYS, PROMPTS, REPORT_CALL_TIMEOUT, CallOptions,
+    RequestTally, analysis_job, call_gemini, create_extraction_cache, create_extraction_pool, create_gemini_client,
+    create_job_index, create_job_queue, create_model_router, create_rate_limiter, create_response_cache,
+    create_response_history, create_section_cache, create_session_registry, gemini_call, is_job_library_admin,
+    model_options, parse_match_percentage, prepare_inputs, record_cache_lookup, record_llm_call, report_job,
+    response_stats, resume_for_prompt, route_options, scan_pdf_bytes, start_metrics_exporters, stream_gemini
+)
+from jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING
+from metrics import METRICS
+import pandas as pd
 
 # Page configuration with custom theme
 st.set_page_config(
@@ -25,6 +30,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+page_start = time.perf_counter()
 
 # Custom CSS for improved styling and accessibility
 st.markdown("""
@@ -124,54 +130,25 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Gemini model options with descriptions
-model_options = {
-    "Gemini 2.0 Flash (Next-Gen Fast & Smart)": "gemini-2.0-flash",
-    "Gemini 2.0 Flash-Lite (Low Latency)": "gemini-2.0-flash-lite", 
-    "Gemini 1.5 Flash (Fast & Versatile)": "gemini-1.5-flash",
-    "Gemini 1.5 Flash-8B (High Volume)": "gemini-1.5-flash-8b",
-    "Gemini 1.5 Pro (Advanced Reasoning)": "gemini-1.5-pro"
-}
-
-# Prompts dictionary
-PROMPTS = {
-    "submit1": """
-        You are an experienced Technical Human Resource Manager. Your task is to review the provided resume 
-        against the job description. Highlight strengths and weaknesses in relation to the role.
-    """,
-    "submit2": """
-    You are a Technical HR Manager with experience in assessing skill development. Evaluate the resume against the job description.
-
-    Provide:
-    1. Skills that are relevant and strong.
-    2. Skills that are lacking or could be improved.
-    3. Specific suggestions to enhance the candidate's technical and soft skills for this role.
-    """,
-    "submit3": """
-        You are an ATS scanner with HR experience. Evaluate resume vs. job description, list missing keywords, 
-        and suggest skill improvements.
-    """,
-    "submit4": """
-    You are an intelligent ATS (Applicant Tracking System) scanner. Analyze the resume against the job description and provide the following:
-
-    1. An estimated **match percentage** between the resume and the job description.
-    2. A brief explanation of how this score was determined — highlight key strengths and gaps.
-    3. Keep your response short, structured, and easy to understand.
-    """,
-    "submit5": """
-    You are a professional Technical Recruiter. Carefully review the candidate's resume and compare it with the job description.
-
-    Provide:
-    1. A judgment on whether this candidate is likely to be shortlisted for an interview (Yes, Maybe, or Unlikely).
-    2. A brief explanation supporting your judgment based on relevant skills, experience, and alignment.
-    3. Any critical gaps that might lower the chances.
-    4. Suggestions to improve the chances of getting noticed or selected.
-    """
-}
-
 # Session timeout in minutes
 SESSION_TIMEOUT = 30
 
+# Maximum number of Gemini API calls per session
+API_CALL_LIMIT = int(os.getenv("API_CALL_LIMIT", "50"))
+
+# Seconds between refreshes of the jobs panel while background analyses are running
+JOBS_REFRESH_SECONDS = 1.0
+# Most recent jobs listed in the jobs panel
+JOBS_SHOWN = 10
+JOB_STATUS_ICONS = {QUEUED: "🕒", RUNNING: "⏳", DONE: "✅", FAILED: "❌", CANCELLED: "🚫"}
+# Newest history entries rendered in the results panel; older ones are shown on request
+HISTORY_RENDERED = 10
+# Show the server time taken by the page and each fragment under it
+SHOW_RENDER_TIMES = os.getenv("SHOW_RENDER_TIMES", "").lower() in ("1", "true", "yes")
+# Analyses prefetched in the background once the inputs are ready, when enabled
+PREFETCH_KEYS = ("submit4", "submit1")
+
+
 # Initialize session state
 if 'session_id' not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
@@ -179,6 +156,10 @@ if 'session_start_time' not in st.session_state:
     st.session_state.session_start_time = datetime.now()
 if 'api_calls_count' not in st.session_state:
     st.session_state.api_calls_count = 0
+if 'speculative_calls_count' not in st.session_state:
+    st.session_state.speculative_calls_count = 0
+if 'prefetch_hits' not in st.session_state:
+    st.session_state.prefetch_hits = 0
 if 'inputs_ready' not in st.session_state:
     st.session_state.inputs_ready = False
 if 'user_consent' not in st.session_state:
@@ -186,6 +167,25 @@ if 'user_consent' not in st.session_state:
 if 'privacy_acknowledged' not in st.session_state:
     st.session_state.privacy_acknowledged = False
 
+def record_render_time(scope, seconds):
+    """Record server time spent running the page or one of its fragments"""
+    METRICS.observe("resumerankr_render_seconds", seconds, scope=scope)
+    if SHOW_RENDER_TIMES:
+        st.caption(f"🛠️ Server time ({scope}): {seconds * 1000:.0f} ms")
+
+def timed_render(scope):
+    """Decorate a page section so each run of it is timed under scope"""
+    def decorate(render):
+        @functools.wraps(render)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return render(*args, **kwargs)
+            finally:
+                record_render_time(scope, time.perf_counter() - start)
+        return timed
+    return decorate
+
 def check_session_timeout():
     """Check if session has timed out and reset if needed"""
     current_time = datetime.now()
@@ -197,7 +197,11 @@ def check_session_timeout():
         if 'job_desc' in st.session_state:
             del st.session_state.job_desc
         if 'response_history' in st.session_state:
+            get_session_registry().detach(st.session_state.session_id)
             del st.session_state.response_history
+            del st.session_state.session_results
+        get_job_queue().discard(st.session_state.session_id)
+        st.session_state.pop('prefetch', None)
         st.session_state.session_start_time = current_time
         st.session_state.inputs_ready = False
         st.session_state.user_consent = False
@@ -205,57 +209,170 @@ def check_session_timeout():
         return True
     return False
 
+@st.cache_resource
+def get_extraction_cache():
+    """Process-wide cache of extraction results keyed by PDF content hash"""
+    return create_extraction_cache()
+
+@st.cache_resource
+def get_response_cache():
+    """Process-wide Gemini response cache shared by all sessions"""
+    return create_response_cache()
+
+@st.cache_resource
+def get_section_cache():
+    """Cache of parsed resume sections shared by all sessions"""
+    return create_section_cache()
+
+@st.cache_resource
+def get_job_index():
+    """Process-wide job description index, loaded once at startup"""
+    return create_job_index()
+
+@st.cache_resource
+def get_extraction_pool():
+    """Process pool shared by all sessions for parallel page extraction"""
+    return create_extraction_pool()
+
+@st.cache_resource
+def get_metrics_exporters():
+    """Start the metrics endpoint, textfile writer and JSON event log once per server process"""
+    return start_metrics_exporters()
+
+@st.cache_resource
+def get_session_registry():
+    """Server-wide registry of session data, swept by a reaper thread"""
+    registry = create_session_registry(SESSION_TIMEOUT * 60)
+    # Abandoned sessions' background jobs and their results go with the rest of their data
+    registry.add_store(get_job_queue())
+    return registry
+
+def get_response_history():
+    """This session's capped history, registered so the reaper can clear it if the session is abandoned"""
+    if 'response_history' not in st.session_state:
+        st.session_state.response_history = create_response_history()
+        st.session_state.session_results = {}
+        get_session_registry().attach(
+            st.session_state.session_id,
+            st.session_state.session_start_time.timestamp(),
+            st.session_state.response_history,
+            st.session_state.session_results
+        )
+    return st.session_state.response_history
+
+def get_session_results():
+    """This session's batch ranking and role finder results, cleared along with its history"""
+    get_response_history()
+    return st.session_state.session_results
+
+@st.cache_resource
+def get_job_queue():
+    """Worker pool running analyses in the background for all sessions"""
+    return create_job_queue()
+
+@st.cache_resource
+def get_gemini_client():
+    """Process-wide pooled Gemini client with retries, deadlines and optional hedging"""
+    return create_gemini_client()
+
+@st.cache_resource
+def get_model_router():
+    """Server-wide latency and error tracking per model for Auto routing"""
+    return create_model_router()
+
+@st.cache_resource
+def get_rate_limiter():
+    """Server-wide limiter on Gemini requests and tokens per minute, shared by all sessions"""
+    return create_rate_limiter()
+
+def current_call_options():
+    """Capture the current session's settings for Gemini calls"""
+    return CallOptions(
+        model_name=model_choice,
+        session_id=st.session_state.session_id,
+        client=get_gemini_client(),
+        rate_limiter=get_rate_limiter(),
+        response_cache=get_response_cache(),
+        # Calls already queued in the background and speculative prefetches count against the limit too
+        budget=CallBudget(
+            API_CALL_LIMIT - st.session_state.api_calls_count - st.session_state.speculative_calls_count
+            - get_job_queue().active_count(st.session_state.session_id)
+        ),
+        compact=compact_prompts,
+        router=get_model_router()
+    )
+
 def extract_pdf_text(uploaded_file):
-    """Extract text from PDF file"""
+    """Extract text from PDF file, reusing cached results for identical uploads"""
     try:
-        doc = fitz.open(stream=uploaded_file.read(), filetype="pdf")
-        text = " ".join(page.get_text() for page in doc)
-        
-        # Check for sensitive data patterns (simple example)
-        sensitive_patterns = [
-            r'\b\d{3}-\d{2}-\d{4}\b',  # SSN
-            r'\b\d{16}\b',             # Credit card
-            r'\b(?:password|passwd)(?:\s*:)?\s*\w+\b'  # Password
-        ]
-        
-        for pattern in sensitive_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                st.error("⚠️ Your resume may contain sensitive personal information. Please remove and re-upload.")
-                return None
-                
-        return text
+        result = scan_pdf_bytes(uploaded_file.read(), get_extraction_cache(), get_extraction_pool())
+        if result.sensitive_rule is not None:
+            st.error("⚠️ Your resume may contain sensitive personal information. Please remove and re-upload.")
+            return None
+
+        return result.text
+    except ExtractionError as e:
+        st.error(f"⚠️ {str(e)}. Please upload a shorter resume.")
+        return None
     except Exception as e:
         st.error(f"Error processing PDF: {str(e)}")
         return None
 
-def get_gemini_response(prompt, pdf_content, job_desc):
-    """Get response from Gemini model with rate limiting"""
+def get_gemini_response(prompt, pdf_content, job_desc, task=None):
+    """Get response from Gemini model with compaction, caching and rate limiting"""
+    options = route_options(current_call_options(), task, pdf_content, job_desc)
+    pdf_content, job_desc, compaction_stats = prepare_inputs(options.model_name, pdf_content, job_desc, options.compact)
+
+    # Serve repeated requests from the cache; hits do not count against the limit
+    cache = options.response_cache
+    cache_key = response_cache_key(options.model_name, prompt, pdf_content, job_desc)
+    start = time.time()
+    cached_text = cache.get(cache_key)
+    record_cache_lookup(cached_text is not None)
+    if cached_text is not None:
+        return cached_text, response_stats(options.model_name, time.time() - start, compaction_stats, cached=True)
+
     # Check rate limits
-    if st.session_state.api_calls_count >= 50:  # Example limit
+    if st.session_state.api_calls_count >= API_CALL_LIMIT:
         st.error("API usage limit reached. Please try again later.")
-        return "Rate limit exceeded. Please try again later.", 0
+        return None, {}
     
+    tally = RequestTally()
     try:
-        model = genai.GenerativeModel(model_choice)
-        start = time.time()
-        response = model.generate_content([prompt, pdf_content, job_desc])
-        end = time.time()
+        first_token = None
+        queue_status = st.empty()
+        show_queue = lambda position, wait: queue_status.info(
+            f"⏳ High demand: you are #{position} in the queue (estimated wait {wait:.0f} seconds)"
+        )
+        if stream_responses:
+            card = st.empty()
+            render_chunk = lambda partial_text: card.markdown(partial_text + " ▌")
+            response_text, first_token, duration = stream_gemini(
+                options, prompt, pdf_content, job_desc, render_chunk, show_queue, tally
+            )
+            with card.container():
+                st.markdown(response_text)
+                st.caption(f"⏱️ First token: {first_token:.2f} seconds · Total: {duration:.2f} seconds")
+        else:
+            response_text, duration = call_gemini(options, prompt, pdf_content, job_desc, show_queue, tally)
+        queue_status.empty()
         
-        # Log API call
-        st.session_state.api_calls_count += 1
+        # Log API calls, retries and hedges included
+        st.session_state.api_calls_count += tally.count
+        cache.put(cache_key, response_text)
         
-        # Log usage (in real app, this might send to a database)
-        logging_data = {
-            "timestamp": datetime.now().isoformat(),
-            "session_id": st.session_state.session_id,
-            "model": model_choice,
-            "duration": end - start
-        }
+        # Log usage to the metrics registry and the JSON event log
+        record_llm_call(options, "stream" if stream_responses else "generate", duration, compaction_stats, first_token)
         
-        return response.text, end - start
+        # Saved with the history entry; the streamed card is gone after the rerun that shows it
+        return response_text, response_stats(
+            options.model_name, duration, compaction_stats, time_to_first_token=first_token
+        )
     except Exception as e:
+        # Requests sent before the failure still count against the limit
+        st.session_state.api_calls_count += tally.count
         st.error(f"API Error: {str(e)}")
-        return f"Error: {str(e)}", 0
+        return None, {}
 
 def validate_inputs():
     """Validate that both job description and resume are provided"""
@@ -271,33 +388,72 @@ def validate_inputs():
     return True
 
 def handle_response(prompt_key_or_custom):
-    """Handle response generation with error handling"""
+    """Handle response generation with error handling; returns (output, stats fields for the history)"""
     # First check for timeout
     if check_session_timeout():
-        return "", None
+        return "", {}
         
     if not validate_inputs():
-        return "", None
+        return "", {}
 
     with st.spinner("Analyzing your resume... This may take a moment"):
         try:
             uploaded_file.seek(0)
             pdf_text = extract_pdf_text(uploaded_file)
             if pdf_text is None:
-                return "", None
+                return "", {}
                 
+            if prompt_key_or_custom in LOCAL_SCORING_KEYS:
+                start = time.time()
+                local_score = score_resume(pdf_text, job_desc)
+                # Rendered below the tabs, so it survives the rerun that shows new results
+                st.session_state.instant_score = (inputs_digest(), local_score)
+                if local_scoring_only:
+                    response_text = format_local_score(local_score)
+                    stats = {"duration": round(time.time() - start, 3)}
+                    if prompt_key_or_custom == "submit4":
+                        return (local_score.score, response_text), stats
+                    return response_text, stats
+
             prompt = PROMPTS.get(prompt_key_or_custom, prompt_key_or_custom)
-            response_text, duration = get_gemini_response(prompt, pdf_text, job_desc)
+            if compact_prompts:
+                pdf_text = resume_for_prompt(prompt_key_or_custom, pdf_text, uploaded_file.getvalue(), get_section_cache())
+
+            # Streamed responses render in place; everything else runs as a background job
+            if not stream_responses:
+                if adopt_prefetch(prompt_key_or_custom):
+                    return "", {}
+                label = ANALYSIS_LABELS.get(prompt_key_or_custom, f"Custom: {prompt_key_or_custom}")
+                submit_job(label, analysis_job, current_call_options(), prompt_key_or_custom, prompt, pdf_text, job_desc, label)
+                return "", {}
+
+            response_text, stats = get_gemini_response(prompt, pdf_text, job_desc, prompt_key_or_custom)
+            if response_text is None:
+                return "", {}
             
             if prompt_key_or_custom == "submit4":
-                match = re.search(r"(\d{1,3})\s*%", response_text)
-                percentage = int(match.group(1)) if match else None
-                return (percentage, response_text), duration
+                percentage = parse_match_percentage(response_text)
+                return (percentage, response_text), stats
 
-            return response_text, duration
+            return response_text, stats
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
-            return f"Error: {str(e)}", None
+            return "", {}
+
+def display_local_score(local_score):
+    """Show the instant keyword match computed without an API call"""
+    st.metric("Instant Keyword Match", f"{local_score.score}%")
+    if local_score.missing_terms:
+        st.caption("Top missing terms: " + ", ".join(local_score.missing_terms))
+
+def format_local_score(local_score):
+    """Format a local keyword score as an analysis result"""
+    return (
+        f"Local keyword match: {local_score.score}%\n\n"
+        f"**Matched terms:** {', '.join(local_score.matched_terms) or 'None'}\n\n"
+        f"**Missing terms:** {', '.join(local_score.missing_terms) or 'None'}\n\n"
+        "_Computed locally from keyword overlap without an AI call._"
+    )
 
 def display_response(response_output, response_time_taken=None):
     """Display formatted response"""
@@ -309,59 +465,518 @@ def display_response(response_output, response_time_taken=None):
             st.caption(f"⏱️ Response time: {response_time_taken:.2f} seconds")
         st.markdown("</div>", unsafe_allow_html=True)
 
-def save_response_history(response, query_type):
-    """Save response to session state history"""
-    if 'response_history' not in st.session_state:
-        st.session_state.response_history = []
-    
+def format_response_stats(item):
+    """Caption describing the call behind a history entry, or None for entries saved without stats"""
+    parts = []
+    if "time_to_first_token" in item:
+        parts.append(f"⏱️ First token: {item['time_to_first_token']:.2f} seconds")
+    if "duration" in item:
+        parts.append(f"{'Total' if parts else '⏱️ Response time'}: {item['duration']:.2f} seconds")
+    if "tokens_before" in item:
+        parts.append(f"📉 Input tokens: {item['tokens_before']:,} → {item['tokens_after']:,}")
+    if item.get("model"):
+        parts.append(f"🤖 {item['model']}" + (" (cached)" if item.get("cached") else ""))
+    return " · ".join(parts) or None
+
+def display_history_item(item):
+    """Show one saved response with the stats of the call that produced it"""
+    with METRICS.timer("resumerankr_stage_seconds", stage="render"):
+        with st.expander(f"{item['type']} ({item['timestamp']})"):
+            st.write(item['response'])
+            stats = format_response_stats(item)
+            if stats:
+                st.caption(stats)
+
+def save_response_history(response, query_type, **fields):
+    """Save response to session state history, with any parsed fields such as match_percentage"""
     timestamp = datetime.now().strftime("%H:%M:%S")
-    st.session_state.response_history.append({
+    get_response_history().append({
         "type": query_type,
         "timestamp": timestamp,
-        "response": response
+        "response": response,
+        **fields
     })
 
-# Add this function to convert analysis history to a Word document
-def convert_history_to_docx(history):
-    """Convert analysis history data to a Word document format"""
-    doc = Document()
-    
-    # Add a title
-    title = doc.add_heading('ResumeRankr Analysis Results', 0)
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    # Add timestamp
-    timestamp_para = doc.add_paragraph()
-    timestamp_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    timestamp_para.add_run(f'Generated on {datetime.now().strftime("%B %d, %Y at %H:%M:%S")}')
+def submit_job(label, fn, *args, timeout=None):
+    """Queue work in the background; the jobs panel saves its results to history when it finishes"""
+    get_job_queue().submit(st.session_state.session_id, label, fn, *args, timeout=timeout, track_wait=True)
+    st.toast(f"🕒 {label} queued")
+
+def save_job_results(job):
+    """Save the history entries produced by a finished job"""
+    entries, requests = job.result
+    st.session_state.api_calls_count += requests
+    for label, response_text, fields in entries:
+        save_response_history(response_text, label, **fields)
+
+def run_full_report():
+    """Queue every analysis as background jobs, or one structured job when enabled"""
+    if check_session_timeout() or not validate_inputs():
+        return
+
+    uploaded_file.seek(0)
+    pdf_text = extract_pdf_text(uploaded_file)
+    if pdf_text is None:
+        return
+
+    options = current_call_options()
+    if structured_report:
+        submit_job("Full Report", report_job, options, pdf_text, job_desc)
+        return
+
+    pdf_bytes = uploaded_file.getvalue()
+    for prompt_key, prompt in PROMPTS.items():
+        resume_text = resume_for_prompt(prompt_key, pdf_text, pdf_bytes, get_section_cache()) if options.compact else pdf_text
+        label = ANALYSIS_LABELS[prompt_key]
+        submit_job(
+            label, analysis_job, options, prompt_key, prompt, resume_text, job_desc, label, timeout=REPORT_CALL_TIMEOUT
+        )
+
+@timed_render("jobs")
+def render_jobs_panel():
+    """List this session's background jobs and save results of any that finished"""
+    queue = get_job_queue()
+    finished = queue.collect(st.session_state.session_id)
+    for job in finished:
+        if job.status != DONE:
+            continue
+        if job.speculative:
+            # Held until the user asks for it; only the spend is recorded now
+            st.session_state.speculative_calls_count += job.result[1]
+        else:
+            save_job_results(job)
+    if any(not job.speculative for job in finished) or (st.session_state.jobs_polling and not jobs_active()):
+        # Rerun the whole page so the results panel shows the new entries and polling stops once idle
+        st.rerun()
+
+    jobs = [job for job in queue.jobs(st.session_state.session_id) if not job.speculative][-JOBS_SHOWN:]
+    if not jobs:
+        return
+    with st.expander("🧵 Analysis jobs", expanded=any(not job.finished for job in jobs)):
+        for job in reversed(jobs):
+            timing = f"queued {job.queue_seconds:.1f}s"
+            if job.run_seconds is not None:
+                timing += f" · ran {job.run_seconds:.1f}s"
+            col_status, col_cancel = st.columns([4, 1])
+            col_status.markdown(f"{JOB_STATUS_ICONS[job.status]} **{job.label}** · {job.status} · {timing}")
+            if job.waiting is not None:
+                position, wait = job.waiting
+                col_status.caption(f"⏳ High demand: #{position} in the queue (estimated wait {wait:.0f} seconds)")
+            if job.status == FAILED:
+                col_status.caption(f"Error: {job.error}")
+            if not job.finished:
+                col_cancel.button("Cancel", key=f"cancel_{job.id}", on_click=queue.cancel, args=(job.id,))
+
+def resume_digest():
+    """Content digest of the uploaded resume, hashed once per upload"""
+    digest = st.session_state.get("resume_digest")
+    if digest is None or digest[0] != uploaded_file.file_id:
+        digest = st.session_state.resume_digest = (uploaded_file.file_id, content_digest(uploaded_file.getvalue()))
+    return digest[1]
+
+def inputs_digest():
+    """Identify the current resume and job description"""
+    return resume_digest() + content_digest(job_desc.encode("utf-8"))
+
+def shared_page_state():
+    """What panels outside the analysis tabs render from"""
+    return get_response_history().version, st.session_state.get("job_desc", "")
+
+def jobs_active():
+    """Whether this session has queued or running background jobs"""
+    return get_job_queue().active_count(st.session_state.session_id) > 0
+
+def prefetch_key():
+    """Identify the inputs and settings a prefetch was made for"""
+    return "|".join((inputs_digest(), model_choice, str(compact_prompts), str(local_scoring_only)))
+
+def start_prefetch():
+    """Speculatively run the default analyses in the background for the current inputs"""
+    key = prefetch_key()
+    prefetch = st.session_state.get("prefetch")
+    if prefetch is not None and prefetch["key"] == key:
+        return
+    cancel_prefetch()
+
+    uploaded_file.seek(0)
+    pdf_text = extract_pdf_text(uploaded_file)
+    if pdf_text is None:
+        return
+    options = current_call_options()
+    job_ids = {}
+    for prompt_key in PREFETCH_KEYS:
+        if local_scoring_only and prompt_key in LOCAL_SCORING_KEYS:
+            continue
+        resume_text = pdf_text
+        if compact_prompts:
+            resume_text = resume_for_prompt(prompt_key, pdf_text, uploaded_file.getvalue(), get_section_cache())
+        label = ANALYSIS_LABELS[prompt_key]
+        job_ids[prompt_key] = get_job_queue().submit(
+            st.session_state.session_id, label, analysis_job,
+            options, prompt_key, PROMPTS[prompt_key], resume_text, job_desc, label,
+            speculative=True, track_wait=True
+        )
+        METRICS.inc("resumerankr_prefetch_total", outcome="started")
+    st.session_state.prefetch = {"key": key, "jobs": job_ids}
+
+def cancel_prefetch():
+    """Cancel prefetches that were never asked for, e.g. after the inputs changed"""
+    prefetch = st.session_state.pop("prefetch", None)
+    if prefetch is None:
+        return
+    queue = get_job_queue()
+    for job_id in prefetch["jobs"].values():
+        job = queue.get(job_id)
+        if job is not None and job.speculative:
+            outcome = "cancelled" if queue.cancel(job_id) else "unused"
+            METRICS.inc("resumerankr_prefetch_total", outcome=outcome)
+
+def adopt_prefetch(prompt_key):
+    """Use the prefetch for prompt_key instead of a new call; returns True if there was one"""
+    prefetch = st.session_state.get("prefetch")
+    if prefetch is None or prefetch["key"] != prefetch_key():
+        return False
+    job_id = prefetch["jobs"].pop(prompt_key, None)
+    job = get_job_queue().adopt(job_id) if job_id is not None else None
+    if job is None:
+        return False
+    METRICS.inc("resumerankr_prefetch_total", outcome="used")
+    st.session_state.prefetch_hits += 1
+    if job.collected:
+        # Finished while still speculative, so its spend is already counted
+        for label, response_text, fields in job.result[0]:
+            save_response_history(response_text, label, **fields)
+    else:
+        st.toast(f"⏳ {job.label} is already running")
+    return True
+
+def extract_batch_resume(pdf_bytes, extraction_cache, extraction_pool):
+    """Extract one batch resume's text, refusing resumes with sensitive data"""
+    result = scan_pdf_bytes(pdf_bytes, extraction_cache, extraction_pool)
+    if result.sensitive_rule is not None:
+        raise ValueError("Resume may contain sensitive personal information")
+    return result.text
+
+def run_batch_ranking(uploaded_files, max_in_flight):
+    """Score many resumes against the job description and stream a ranking table"""
+    uploads = list(iter_pdf_uploads(uploaded_files))
+    if not uploads:
+        st.warning("⚠️ No PDF resumes found in the uploaded files.")
+        return
+
+    options = current_call_options()
+    extraction_cache = get_extraction_cache()
+    extraction_pool = get_extraction_pool()
+    # Uploads are tracked by position, so identical files each get their own row
+    extract = lambda index: extract_batch_resume(uploads[index][1], extraction_cache, extraction_pool)
+
+    rows = []
+    progress = st.progress(0.0, text=f"Scored 0 of {len(uploads)} resumes")
+    table = st.empty()
+
+    def show_rows():
+        rows.sort(key=lambda row: -1 if row["Match %"] is None else row["Match %"], reverse=True)
+        progress.progress(len(rows) / len(uploads), text=f"Scored {len(rows)} of {len(uploads)} resumes")
+        table.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+    texts = {}
+    for index, text, error in run_bounded(extract, range(len(uploads)), max_in_flight):
+        if error is None:
+            texts[index] = text
+        else:
+            rows.append({"Resume": uploads[index][0], "Match %": None, "Keyword %": None, "Status": f"Error: {error}", "Time (s)": None, "Explanation": ""})
+    if rows:
+        show_rows()
+
+    # Keyword scores for every resume come from one vectorized pass; only the Gemini calls run per resume
+    keyword_scores = dict(zip(texts, score_resumes(list(texts.values()), job_desc).tolist()))
+    score = lambda index: gemini_call(options, PROMPTS["submit4"], texts[index], job_desc, task="submit4")
+    for index, result, error in run_bounded(score, list(texts), max_in_flight):
+        name = uploads[index][0]
+        keyword_score = keyword_scores[index]
+        if error is None:
+            response_text, duration, cached = result[:3]
+            st.session_state.api_calls_count += result.requests
+            rows.append({
+                "Resume": name,
+                "Match %": parse_match_percentage(response_text),
+                "Keyword %": keyword_score,
+                "Status": "Cached" if cached else "Scored",
+                "Time (s)": round(duration, 2),
+                "Explanation": response_text
+            })
+        else:
+            rows.append({"Resume": name, "Match %": None, "Keyword %": keyword_score, "Status": f"Error: {error}", "Time (s)": None, "Explanation": ""})
+        show_rows()
+
+    get_session_results()["batch_results"] = rows
+
+def use_posting_as_job_desc(posting_id):
+    """Copy a library posting into the job description field"""
+    st.session_state.job_desc = get_job_index().postings[posting_id]["text"]
+
+def find_matching_roles(top_k):
+    """Retrieve the library postings that best match the uploaded resume"""
+    if uploaded_file is None:
+        st.error("⚠️ Please upload a PDF resume to proceed.")
+        return
+    if not st.session_state.user_consent:
+        st.error("⚠️ Please provide consent for data processing before proceeding.")
+        return
+    uploaded_file.seek(0)
+    pdf_text = extract_pdf_text(uploaded_file)
+    if pdf_text is not None:
+        get_session_results()["role_matches"] = get_job_index().search(pdf_text, top_k)
+
+def score_matching_roles(matches):
+    """Run the Match Percentage analysis for each retrieved posting concurrently"""
+    uploaded_file.seek(0)
+    pdf_text = extract_pdf_text(uploaded_file)
+    if pdf_text is None:
+        return
+
+    postings = get_job_index().postings
+    options = current_call_options()
+    analyze = lambda match: gemini_call(
+        options, PROMPTS["submit4"], pdf_text, postings[match[0]]["text"], task="submit4"
+    )
+
+    with st.spinner(f"Scoring {len(matches)} roles..."):
+        for (_, title, _), result, error in run_bounded(analyze, matches, len(matches), timeout=REPORT_CALL_TIMEOUT):
+            if error is not None:
+                st.error(f"{title}: {error}")
+                continue
+            st.session_state.api_calls_count += result.requests
+            save_response_history(result.result, f"Role Match: {title}", **result.history_fields())
+
+@st.fragment
+@timed_render("tabs")
+def render_analysis_tabs(rendered_page_state):
+    """Analysis tabs; interactions rerun only this panel unless they change what the rest of the page shows"""
+    # Organized buttons in tabs for better categorization
+    tabs = st.tabs(["Basic Analysis", "Detailed Analysis", "Custom Query", "Batch Ranking", "Role Finder"])
     
-    # Add a divider
-    doc.add_paragraph('_' * 50)
+    with tabs[0]:
+        col1a, col1b = st.columns(2)
+        with col1a:
+            if st.button("✨ Resume Overview", use_container_width=True) and st.session_state.inputs_ready:
+                response_output, call_stats = handle_response("submit1")
+                if response_output:  # Only save if there's actual content
+                    save_response_history(response_output, "Resume Overview", **call_stats)
+                
+        with col1b:
+            if st.button("🎯 Match Percentage", use_container_width=True) and st.session_state.inputs_ready:
+                result, call_stats = handle_response("submit4")
+                if isinstance(result, tuple):
+                    percentage, explanation = result
+                    save_response_history(explanation, "Match Percentage", match_percentage=percentage, **call_stats)
+
+        if st.button("📊 Run Full Report", use_container_width=True, help="Run all five analyses at once") and st.session_state.inputs_ready:
+            run_full_report()
+                    
+    with tabs[1]:
+        col2a, col2b = st.columns(2)
+        with col2a:
+            if st.button("🚀 Skill Improvement", use_container_width=True) and st.session_state.inputs_ready:
+                response_output, call_stats = handle_response("submit2")
+                if response_output:
+                    save_response_history(response_output, "Skill Improvement", **call_stats)
+                
+        with col2b:
+            if st.button("🔍 Missing Keywords", use_container_width=True) and st.session_state.inputs_ready:
+                response_output, call_stats = handle_response("submit3")
+                if response_output:
+                    save_response_history(response_output, "Missing Keywords", **call_stats)
+                
+        if st.button("👔 Interview Chances", use_container_width=True) and st.session_state.inputs_ready:
+            response_output, call_stats = handle_response("submit5")
+            if response_output:
+                save_response_history(response_output, "Interview Chances", **call_stats)
+            
+    with tabs[2]:
+        custom_query = st.text_input(
+            "Ask a specific question:",
+            placeholder="Example: What specific certifications would help me for this role?"
+        )
+        if st.button("🔮 Answer My Question", use_container_width=True) and custom_query and st.session_state.inputs_ready:
+            response_output, call_stats = handle_response(custom_query)
+            if response_output:
+                save_response_history(response_output, f"Custom: {custom_query}", **call_stats)
+
+    with tabs[3]:
+        st.markdown("Rank many resumes against the job description above using the Match Percentage analysis.")
+        batch_files = st.file_uploader(
+            "Upload resumes (PDFs or a zip of PDFs)",
+            type=["pdf", "zip"],
+            accept_multiple_files=True,
+            help="Each resume is scanned for sensitive data before analysis"
+        )
+        max_in_flight = st.slider(
+            "Max concurrent API calls:",
+            min_value=1,
+            max_value=16,
+            value=4,
+            help="Lower values stay further within API quota"
+        )
+        if st.button("🏆 Rank Resumes", use_container_width=True):
+            if not job_desc.strip():
+                st.error("⚠️ Please enter a job description before submitting.")
+            elif not batch_files:
+                st.error("⚠️ Please upload at least one PDF resume to rank.")
+            elif not st.session_state.user_consent:
+                st.error("⚠️ Please provide consent for data processing before proceeding.")
+            elif not check_session_timeout():
+                run_batch_ranking(batch_files, max_in_flight)
+        elif get_session_results().get("batch_results"):
+            st.dataframe(pd.DataFrame(get_session_results()["batch_results"]), use_container_width=True, hide_index=True)
+
+    with tabs[4]:
+        job_index = get_job_index()
+        st.markdown("Find the roles in the job library that best fit your resume, then analyze only those.")
+        with st.expander(f"🗂️ Manage Job Library ({len(job_index)} postings)"):
+            # The library is shared by every session and saved to disk, so edits need the admin key
+            admin_key = ""
+            if JOB_LIBRARY_ADMIN_KEY:
+                admin_key = st.text_input("Admin key:", type="password", key="job_library_admin_key")
+            if not is_job_library_admin(admin_key):
+                st.caption("🔒 The job library is shared by everyone using this app; only an administrator can add or remove postings.")
+            else:
+                with st.form("add_posting", clear_on_submit=True):
+                    posting_title = st.text_input("Role title:")
+                    posting_text = st.text_area("Job description:", height=150)
+                    if st.form_submit_button("➕ Add to Library") and posting_title.strip() and posting_text.strip():
+                        job_index.add(posting_title.strip(), posting_text)
+                        st.success(f"✅ Added \"{posting_title.strip()}\" to the library")
+                if len(job_index):
+                    posting_to_remove = st.selectbox(
+                        "Remove a posting:",
+                        list(job_index.postings),
+                        format_func=lambda posting_id: job_index.postings[posting_id]["title"]
+                    )
+                    if st.button("🗑️ Remove Posting", use_container_width=True):
+                        job_index.remove(posting_to_remove)
+                        st.rerun()
+
+        top_k = st.slider("Number of matching roles:", min_value=1, max_value=10, value=5)
+        if st.button("🔎 Find Matching Roles", use_container_width=True):
+            if not len(job_index):
+                st.warning("⚠️ The job library is empty. An administrator can add postings under Manage Job Library.")
+            else:
+                find_matching_roles(top_k)
+
+        role_matches = [match for match in get_session_results().get("role_matches", []) if match[0] in job_index.postings]
+        if role_matches:
+            for posting_id, title, relevance in role_matches:
+                col_title, col_use = st.columns([3, 1])
+                col_title.markdown(f"**{title}** · relevance {relevance:.2f}")
+                col_use.button(
+                    "Use",
+                    key=f"use_posting_{posting_id}",
+                    on_click=use_posting_as_job_desc,
+                    args=(posting_id,),
+                    help="Copy this posting into the job description field"
+                )
+            if st.button("🎯 Match Percentage for These Roles", use_container_width=True):
+                if uploaded_file is None or not st.session_state.user_consent:
+                    st.error("⚠️ Please upload a resume and provide consent before proceeding.")
+                elif not check_session_timeout():
+                    score_matching_roles(role_matches)
+
+    instant_score = st.session_state.get("instant_score")
+    if instant_score is not None and instant_score[0] == inputs_digest():
+        display_local_score(instant_score[1])
+
+    # Results and the job description are rendered outside this fragment; an idle jobs panel
+    # only starts polling for new jobs after a full rerun, while a polling one picks them up itself
+    if shared_page_state() != rendered_page_state or (not st.session_state.jobs_polling and jobs_active()):
+        st.rerun()
+
+@st.fragment
+@timed_render("results")
+def render_results_panel():
+    """Show the latest match score, downloads and analysis history"""
+    # Only show analysis results if inputs are ready
+    if st.session_state.inputs_ready:
+        # Display specific percentage match if available
+        response_history = get_response_history()
+        # Find the most recent match percentage
+        match_item = response_history.latest("Match Percentage")
+        if match_item:
+            percentage = match_item.get("match_percentage")
+            
+            if percentage is not None:
+                st.metric(
+                    "Resume-Job Description Match", 
+                    f"{percentage}%",
+                    delta=None
+                )
+                
+                # Color-coded progress bar
+                color = "green" if percentage >= 70 else "orange" if percentage >= 50 else "red"
+                st.progress(percentage / 100)
+                
+                match_text = "Excellent Match" if percentage >= 85 else \
+                            "Good Match" if percentage >= 70 else \
+                            "Fair Match" if percentage >= 50 else \
+                            "Needs Improvement"
+                            
+                st.info(f"**Match Quality:** {match_text}")
+                
+                # Disclaimer about match percentage
+                st.caption("**Note:** Match percentages are algorithmic estimates and should not be considered definitive.")
     
-    # Process each analysis result
-    for item in history:
-        # Add section heading with type and timestamp
-        heading = doc.add_heading(f'{item["type"]} ({item["timestamp"]})', level=1)
-        
-        # Add the response content
-        para = doc.add_paragraph()
-        para.add_run(item["response"])
+        # Response history with download option
+        if response_history:
+            # Download options; each export is built on click and reused until the history changes
+            download_stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+            download_columns = st.columns(len(EXPORT_FORMATS))
+            for column, (fmt, export_format) in zip(download_columns, EXPORT_FORMATS.items()):
+                with column:
+                    st.download_button(
+                        f"📥 Download {export_format.label}",
+                        data=lambda fmt=fmt: cached_export(
+                            response_history.exports, response_history.version, list(response_history), fmt
+                        ),
+                        file_name=f"ResumeRankr_analysis_{download_stamp}.{export_format.extension}",
+                        mime=export_format.mime,
+                        key=f"download_{fmt}",
+                        on_click="ignore"
+                    )
+            
+            # Older results are only rendered (and decompressed) on request
+            history_items = reversed(response_history)
+            for item in itertools.islice(history_items, HISTORY_RENDERED):
+                display_history_item(item)
+            older_count = len(response_history) - HISTORY_RENDERED
+            if older_count > 0 and st.toggle(f"Show {older_count} older results", key="show_older_results"):
+                for item in history_items:
+                    display_history_item(item)
+        else:
+            st.info("📊 Click an analysis option to see results here.")
+    else:
+        # Show instructions when inputs are not ready
+        st.info("📋 Complete all required inputs to begin analysis:")
+        st.markdown("""
+        1. Provide consent to data processing
+        2. Paste the job description
+        3. Upload your resume (PDF format)
         
-        # Add a divider between sections
-        doc.add_paragraph('_' * 50)
-    
-    # Add footer
-    footer_para = doc.add_paragraph()
-    footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    footer_para.add_run('Generated by ResumeRankr - Powered by Gemini AI')
-    
-    # Save to a temporary file and return the bytes
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as tmp:
-        doc.save(tmp.name)
-        tmp.seek(0)
-        docx_data = open(tmp.name, 'rb').read()
-    
-    return docx_data
+        Once all are provided, analysis options will become available.
+        """)
+            
+        with st.expander("📚 How to get started"):
+            st.markdown("""
+            1. Read and acknowledge the privacy terms
+            2. Paste the job description in the text area
+            3. Upload your resume PDF (remove sensitive information)
+            4. Choose an analysis option from the tabs
+            5. View your results in this panel
+            6. Download your results for future reference
+            """)
+
+# Start metrics export (does nothing unless METRICS_* settings are configured)
+get_metrics_exporters()
+
 # Check for session timeout
 check_session_timeout()
 
@@ -406,6 +1021,8 @@ with st.expander("📜 Privacy & Terms (Important - Please Read)", expanded=not
             st.rerun()
     with col2:
         if st.button("Clear My Data", use_container_width=True):
+            get_session_registry().detach(st.session_state.session_id)
+            get_job_queue().discard(st.session_state.session_id)
             for key in list(st.session_state.keys()):
                 if key not in ['session_id', 'privacy_acknowledged']:
                     if key in st.session_state:
@@ -428,6 +1045,7 @@ with col1:
     
     job_desc = st.text_area(
         "📋 Job Description:", 
+        key="job_desc",
         placeholder="Paste the job description here...",
         height=250,
         help="Paste the full job description text here. Do not include personal identifiable information."
@@ -454,6 +1072,15 @@ with col1:
                 st.json(file_details)
             except:
                 pass
+
+            # Per-page timings for resumes that have already been extracted
+            extraction = get_extraction_cache().get(resume_digest())
+            if extraction is not None and extraction.page_timings:
+                slowest_page = max(range(len(extraction.page_timings)), key=extraction.page_timings.__getitem__)
+                st.caption(
+                    f"Extracted {len(extraction.page_timings)} pages in {sum(extraction.page_timings):.2f} seconds "
+                    f"(slowest: page {slowest_page + 1}, {extraction.page_timings[slowest_page]:.2f} seconds)"
+                )
     
     # Check and update inputs_ready status
     st.session_state.inputs_ready = bool(job_desc.strip() and uploaded_file and st.session_state.user_consent)
@@ -467,10 +1094,62 @@ with col1:
             help="Different models offer varying levels of analysis depth and speed"
         )
         model_choice = model_options[selected_model_label]
+        local_scoring_only = st.checkbox(
+            "Local keyword scoring only",
+            value=False,
+            help="Answer Match Percentage and Missing Keywords instantly from keyword overlap, without an API call"
+        )
+        compact_prompts = st.checkbox(
+            "Compact resume and job description",
+            value=True,
+            help="Send only the resume sections each analysis needs, remove repeated lines, page numbers and job ad "
+                 "boilerplate, and trim to the model's token budget"
+        )
+        stream_responses = st.checkbox(
+            "Stream responses",
+            value=False,
+            help="Show results as they are generated instead of running analyses in the background"
+        )
+        structured_report = st.checkbox(
+            "Full report in a single request",
+            value=False,
+            help="Answer all five analyses from one structured response, sending the resume and job description once"
+        )
+        prefetch_enabled = st.checkbox(
+            "Prefetch likely analyses",
+            value=False,
+            help="Start Match Percentage and Resume Overview in the background as soon as the resume and job "
+                 "description are ready, so they appear instantly when requested. Unused prefetches still use API calls"
+        )
         
         # Add API usage display
-        st.caption(f"API calls in this session: {st.session_state.api_calls_count}/50")
+        st.caption(f"API calls in this session: {st.session_state.api_calls_count}/{API_CALL_LIMIT}")
+        if st.session_state.speculative_calls_count or st.session_state.prefetch_hits:
+            st.caption(
+                f"Speculative prefetch: {st.session_state.speculative_calls_count} API calls, "
+                f"{st.session_state.prefetch_hits} used"
+            )
+        if model_choice == AUTO_MODEL:
+            model_stats = get_model_router().stats()
+            if model_stats:
+                st.caption("Auto routing: " + " · ".join(
+                    f"{model_name} {'–' if latency is None else f'{latency:.1f}s'}, {error_rate:.0%} errors"
+                    for model_name, (latency, error_rate) in sorted(model_stats.items())
+                ))
+        cache_stats = get_response_cache().stats()
+        st.caption(
+            f"Response cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+            f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)"
+        )
     
+    # Prefetch only while the inputs are ready; any change to them cancels the old prefetch
+    if prefetch_enabled and st.session_state.inputs_ready and not stream_responses:
+        start_prefetch()
+    else:
+        cancel_prefetch()
+    # The jobs panel below refreshes itself only while jobs are queued or running
+    st.session_state.jobs_polling = jobs_active()
+
     st.markdown("<div class='section-header'>Analysis Options</div>", unsafe_allow_html=True)
     
     # Show ready status
@@ -487,125 +1166,15 @@ with col1:
         
         st.warning(f"⚠️ Please provide {' and '.join(missing)} before analysis.")
     
-    # Organized buttons in tabs for better categorization
-    tabs = st.tabs(["Basic Analysis", "Detailed Analysis", "Custom Query"])
-    
-    with tabs[0]:
-        col1a, col1b = st.columns(2)
-        with col1a:
-            if st.button("✨ Resume Overview", use_container_width=True) and st.session_state.inputs_ready:
-                response_output, response_time_taken = handle_response("submit1")
-                if response_output:  # Only save if there's actual content
-                    save_response_history(response_output, "Resume Overview")
-                
-        with col1b:
-            if st.button("🎯 Match Percentage", use_container_width=True) and st.session_state.inputs_ready:
-                result, response_time_taken = handle_response("submit4")
-                if isinstance(result, tuple):
-                    percentage, explanation = result
-                    save_response_history(explanation, "Match Percentage")
-                    
-    with tabs[1]:
-        col2a, col2b = st.columns(2)
-        with col2a:
-            if st.button("🚀 Skill Improvement", use_container_width=True) and st.session_state.inputs_ready:
-                response_output, response_time_taken = handle_response("submit2")
-                if response_output:
-                    save_response_history(response_output, "Skill Improvement")
-                
-        with col2b:
-            if st.button("🔍 Missing Keywords", use_container_width=True) and st.session_state.inputs_ready:
-                response_output, response_time_taken = handle_response("submit3")
-                if response_output:
-                    save_response_history(response_output, "Missing Keywords")
-                
-        if st.button("👔 Interview Chances", use_container_width=True) and st.session_state.inputs_ready:
-            response_output, response_time_taken = handle_response("submit5")
-            if response_output:
-                save_response_history(response_output, "Interview Chances")
-            
-    with tabs[2]:
-        custom_query = st.text_input(
-            "Ask a specific question:",
-            placeholder="Example: What specific certifications would help me for this role?"
-        )
-        if st.button("🔮 Answer My Question", use_container_width=True) and custom_query and st.session_state.inputs_ready:
-            response_output, response_time_taken = handle_response(custom_query)
-            if response_output:
-                save_response_history(response_output, f"Custom: {custom_query}")
+    render_analysis_tabs(shared_page_state())
 
 with col2:
     st.markdown("<div class='section-header'>Analysis Results</div>", unsafe_allow_html=True)
     
-    # Only show analysis results if inputs are ready
-    if st.session_state.inputs_ready:
-        # Display specific percentage match if available
-        if 'response_history' in st.session_state and any(item["type"] == "Match Percentage" for item in st.session_state.response_history):
-            # Find the most recent match percentage
-            match_item = next((item for item in reversed(st.session_state.response_history) if item["type"] == "Match Percentage"), None)
-            if match_item:
-                match = re.search(r"(\d{1,3})\s*%", match_item["response"])
-                percentage = int(match.group(1)) if match else None
-                
-                if percentage is not None:
-                    st.metric(
-                        "Resume-Job Description Match", 
-                        f"{percentage}%",
-                        delta=None
-                    )
-                    
-                    # Color-coded progress bar
-                    color = "green" if percentage >= 70 else "orange" if percentage >= 50 else "red"
-                    st.progress(percentage / 100)
-                    
-                    match_text = "Excellent Match" if percentage >= 85 else \
-                                "Good Match" if percentage >= 70 else \
-                                "Fair Match" if percentage >= 50 else \
-                                "Needs Improvement"
-                                
-                    st.info(f"**Match Quality:** {match_text}")
-                    
-                    # Disclaimer about match percentage
-                    st.caption("**Note:** Match percentages are algorithmic estimates and should not be considered definitive.")
-        
-        # Response history with download option
-        if 'response_history' in st.session_state and st.session_state.response_history:
-            # Add download option
-            if st.button("📥 Download Analysis Results"):
-                try:
-                    docx_data = convert_history_to_docx(st.session_state.response_history)
-                    b64 = base64.b64encode(docx_data).decode()
-                    download_filename = f"ResumeRankr_analysis_{datetime.now().strftime('%Y%m%d%H%M%S')}.docx"
-                    href = f'<a href="data:application/vnd.openxmlformats-officedocument.wordprocessingml.document;base64,{b64}" download="{download_filename}">Click to download Word document</a>'
-                    st.markdown(href, unsafe_allow_html=True)
-                except Exception as e:
-                    st.error(f"Error generating Word document: {str(e)}")
-            
-            for item in reversed(st.session_state.response_history):
-                with st.expander(f"{item['type']} ({item['timestamp']})"):
-                    st.write(item['response'])
-        else:
-            st.info("📊 Click an analysis option to see results here.")
-    else:
-        # Show instructions when inputs are not ready
-        st.info("📋 Complete all required inputs to begin analysis:")
-        st.markdown("""
-        1. Provide consent to data processing
-        2. Paste the job description
-        3. Upload your resume (PDF format)
-        
-        Once all are provided, analysis options will become available.
-        """)
-            
-        with st.expander("📚 How to get started"):
-            st.markdown("""
-            1. Read and acknowledge the privacy terms
-            2. Paste the job description in the text area
-            3. Upload your resume PDF (remove sensitive information)
-            4. Choose an analysis option from the tabs
-            5. View your results in this panel
-            6. Download your results for future reference
-            """)
+    # Background jobs, polled while any were queued or running at the start of this run
+    st.fragment(run_every=JOBS_REFRESH_SECONDS if st.session_state.jobs_polling else None)(render_jobs_panel)()
+    
+    render_results_panel()
 
 # Accessibility features
 st.markdown("""
@@ -631,4 +1200,7 @@ st.markdown("</div>", unsafe_allow_html=True)
 elapsed_time = (datetime.now() - st.session_state.session_start_time).total_seconds() / 60
 time_left = max(0, SESSION_TIMEOUT - elapsed_time)
 if time_left < 5:  # Show warning when less than 5 minutes left
-    st.warning(f"⚠️ Your session will expire in {time_left:.1f} minutes. Save your results if needed.")
\ No newline at end of file
+    st.warning(f"⚠️ Your session will expire in {time_left:.1f} minutes. Save your results if needed.")
+
+# Full runs only; fragment reruns are timed by timed_render
+record_render_time("page", time.perf_counter() - page_start)
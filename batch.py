@@ -0,0 +1,96 @@
+import io
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Limits applied when unpacking uploaded archives
+MAX_BATCH_FILES = 500
+MAX_ARCHIVE_MEMBER_BYTES = 20 * 1024 * 1024
+
+
+def iter_pdf_uploads(uploaded_files):
+    """Yield (name, pdf_bytes) for uploaded PDFs, expanding any zip archives"""
+    count = 0
+    for uploaded in uploaded_files:
+        data = uploaded.getvalue()
+        if uploaded.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for member in archive.infolist():
+                    name = member.filename
+                    if member.is_dir() or name.startswith("__MACOSX/") or not name.lower().endswith(".pdf"):
+                        continue
+                    if member.file_size > MAX_ARCHIVE_MEMBER_BYTES:
+                        continue
+                    count += 1
+                    if count > MAX_BATCH_FILES:
+                        return
+                    yield os.path.basename(name), archive.read(member)
+        else:
+            count += 1
+            if count > MAX_BATCH_FILES:
+                return
+            yield uploaded.name, data
+
+
+def run_bounded(fn, items, max_in_flight, timeout=None):
+    """Run fn over items with at most max_in_flight calls running at once.
+
+    Yields (item, result, error) in completion order. A failure in one item is
+    reported as its error and never stops the others. When timeout is given,
+    an item still running that many seconds after submission is reported with
+    a TimeoutError and its late result is discarded.
+    """
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    in_flight = {}
+    deadlines = {}
+
+    def submit_next():
+        item = next(items, None)
+        if item is not None:
+            future = executor.submit(fn, item)
+            in_flight[future] = item
+            if timeout is not None:
+                deadlines[future] = time.monotonic() + timeout
+
+    try:
+        for _ in range(max_in_flight):
+            submit_next()
+        while in_flight:
+            wait_for = None
+            if timeout is not None:
+                wait_for = max(0, min(deadlines[future] for future in in_flight) - time.monotonic())
+            done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in list(in_flight):
+                if future in done:
+                    item = in_flight.pop(future)
+                    error = future.exception()
+                    yield item, None if error else future.result(), error
+                elif timeout is not None and deadlines[future] <= now:
+                    item = in_flight.pop(future)
+                    future.cancel()
+                    yield item, None, TimeoutError(f"No response within {timeout:g} seconds")
+                else:
+                    continue
+                deadlines.pop(future, None)
+                submit_next()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class CallBudget:
+    """Thread-safe counter of API calls that may still be made"""
+
+    def __init__(self, remaining):
+        self.remaining = remaining
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
@@ -0,0 +1,181 @@
+"""Offline benchmark suite: PDF extraction, scanning, exports and end-to-end analysis latency.
+
+Gemini is replaced by a local stub with a configurable latency distribution,
+so no API key or network access is needed. Results are written as JSON.
+
+    python benchmarks/bench_suite.py --latency lognormal:0.3,0.5 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import analysis_history, job_description, resume_pdf  # noqa: E402
+from benchmarks.stub_genai import install  # noqa: E402
+
+PAGE_COUNTS = (1, 5, 20, 50)
+JD_WORDS = {"short": 80, "medium": 400, "long": 1500}
+HISTORY_SIZES = (5, 25, 100)
+
+
+def summarize(samples):
+    """Return latency percentiles in seconds for a list of samples"""
+    ordered = sorted(samples)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "max": ordered[-1],
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_extraction(pdfs, repeat):
+    """Extraction plus scanning through core.scan_pdf_bytes, with a cold cache on every run"""
+    import fitz  # PyMuPDF
+
+    from core import SENSITIVE_DATA_SCANNER, create_extraction_cache, scan_pdf_bytes
+
+    results = []
+    for pages, pdf_bytes in pdfs.items():
+        samples = timed(lambda: scan_pdf_bytes(pdf_bytes, create_extraction_cache(), None), repeat)
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            texts = [page.get_text() for page in doc]
+        scan_samples = timed(lambda: SENSITIVE_DATA_SCANNER.scan_pages(texts), repeat)
+        stats = summarize(samples)
+        scan_stats = summarize(scan_samples)
+        text_bytes = sum(len(text.encode("utf-8")) for text in texts)
+        results.append({
+            "pages": pages,
+            "pdf_bytes": len(pdf_bytes),
+            "extract_and_scan": stats,
+            "pages_per_second": pages / stats["p50"],
+            "scan": scan_stats,
+            "scan_mb_per_second": text_bytes / 1e6 / scan_stats["p50"],
+        })
+    return results
+
+
+def bench_exports(repeat):
+    """Time each history export format"""
+    from exports import EXPORT_FORMATS
+
+    results = []
+    for size in HISTORY_SIZES:
+        history = analysis_history(size)
+        for fmt, export_format in EXPORT_FORMATS.items():
+            results.append({
+                "format": fmt,
+                "entries": size,
+                "latency": summarize(timed(lambda: export_format.build(history), repeat)),
+            })
+    return results
+
+
+def bench_end_to_end(pdfs, job_descs, concurrency_levels, requests, model_name):
+    """Extraction, compaction and a stubbed Gemini call per request at several concurrency levels.
+
+    Every request uses a distinct prompt so the response cache never hits.
+    """
+    from batch import CallBudget, run_bounded
+    from caching import ResponseCache
+    from clients import GeminiClient
+    from core import PROMPTS, CallOptions, cached_gemini_call, create_extraction_cache, scan_pdf_bytes
+    from ratelimit import GlobalRateLimiter, MemoryBucketStore
+
+    options = CallOptions(
+        model_name=model_name,
+        session_id="bench",
+        client=GeminiClient(api_key="benchmark", max_retries=0),
+        rate_limiter=GlobalRateLimiter(MemoryBucketStore(10 ** 9, 10 ** 12)),
+        response_cache=ResponseCache(32 * 1024 * 1024, ttl_seconds=3600),
+        budget=CallBudget(float("inf")),
+        compact=True
+    )
+    extraction_cache = create_extraction_cache()
+    cases = [(pdf_bytes, job_desc) for pdf_bytes in pdfs.values() for job_desc in job_descs.values()]
+
+    def handle(request):
+        concurrency, index = request
+        pdf_bytes, job_desc = cases[index % len(cases)]
+        start = time.perf_counter()
+        result = scan_pdf_bytes(pdf_bytes, extraction_cache, None)
+        cached_gemini_call(options, f"{PROMPTS['submit4']}\n#{concurrency}-{index}", result.text, job_desc)
+        return time.perf_counter() - start
+
+    results = []
+    for concurrency in concurrency_levels:
+        samples = []
+        errors = 0
+        start = time.perf_counter()
+        for _, latency, error in run_bounded(handle, ((concurrency, index) for index in range(requests)), concurrency):
+            if error is None:
+                samples.append(latency)
+            else:
+                errors += 1
+        elapsed = time.perf_counter() - start
+        results.append({
+            "concurrency": concurrency,
+            "requests": requests,
+            "errors": errors,
+            "throughput_rps": len(samples) / elapsed,
+            "latency": summarize(samples) if samples else None,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", default="lognormal:0.2,0.5",
+                        help="stub Gemini latency: fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--pages", type=int, nargs="+", default=list(PAGE_COUNTS))
+    parser.add_argument("--repeat", type=int, default=5, help="runs per extraction/export measurement")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=48, help="end-to-end requests per concurrency level")
+    parser.add_argument("--model", default="gemini-1.5-flash")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    install(args.latency)
+    pdfs = {pages: resume_pdf(pages) for pages in args.pages}
+    job_descs = {name: job_description(words) for name, words in JD_WORDS.items()}
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "extraction": bench_extraction(pdfs, args.repeat),
+        "exports": bench_exports(args.repeat),
+        "end_to_end": bench_end_to_end(pdfs, job_descs, args.concurrency, args.requests, args.model),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
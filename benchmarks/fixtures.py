@@ -0,0 +1,76 @@
+"""Synthetic resume PDFs and job descriptions for benchmarks."""
+import random
+
+import fitz  # PyMuPDF
+
+SKILLS = (
+    "python django flask fastapi aws gcp docker kubernetes terraform postgres redis kafka react typescript "
+    "graphql ci/cd airflow spark pandas numpy pytorch linux"
+).split()
+VERBS = "built led designed delivered migrated reduced improved automated mentored scaled owned launched".split()
+NOUNS = "api service pipeline platform dashboard team cluster database workflow feature integration".split()
+BOILERPLATE = [
+    "We are an equal opportunity employer and value diversity.",
+    "Benefits include medical insurance, dental insurance and a 401(k) match.",
+    "Competitive salary and paid time off.",
+]
+
+# Lines of resume text per synthetic page
+LINES_PER_PAGE = 45
+
+
+def _bullet(rng):
+    return (
+        f"- {rng.choice(VERBS).capitalize()} {rng.choice(NOUNS)} using {rng.choice(SKILLS)} and "
+        f"{rng.choice(SKILLS)}, improving throughput by {rng.randint(5, 80)}%"
+    )
+
+
+def resume_lines(pages, seed=0):
+    """Return resume text lines for a document of roughly the given page count"""
+    rng = random.Random(seed)
+    lines = ["Jane Doe", "Senior Software Engineer", "Summary", "Backend engineer with cloud experience.",
+             "Skills", ", ".join(rng.sample(SKILLS, 10)), "Experience"]
+    while len(lines) < pages * LINES_PER_PAGE - 4:
+        lines.append(f"Engineer, Company {rng.randint(1, 99)} ({rng.randint(2010, 2020)}-{rng.randint(2021, 2025)})")
+        lines.extend(_bullet(rng) for _ in range(6))
+    lines.extend(["Education", "B.Sc. Computer Science"])
+    return lines
+
+
+def resume_pdf(pages, seed=0):
+    """Build a synthetic resume PDF with the given page count and return its bytes"""
+    lines = resume_lines(pages, seed)
+    with fitz.open() as doc:
+        for start in range(0, len(lines), LINES_PER_PAGE):
+            page = doc.new_page()
+            page.insert_text((54, 54), "\n".join(lines[start:start + LINES_PER_PAGE]), fontsize=9)
+        # Trailing short page if line count rounding left one over
+        while doc.page_count < pages:
+            doc.new_page().insert_text((54, 54), _bullet(random.Random(seed)), fontsize=9)
+        return doc.tobytes()
+
+
+def job_description(words, seed=0):
+    """Build a synthetic job description of about the given word count, including boilerplate"""
+    rng = random.Random(seed)
+    lines = ["Senior Backend Engineer", "Requirements:"]
+    count = 3
+    while count < words:
+        line = f"- Experience with {rng.choice(SKILLS)}, {rng.choice(SKILLS)} and {rng.choice(NOUNS)} design"
+        lines.append(line)
+        count += len(line.split())
+    return "\n".join(lines + BOILERPLATE)
+
+
+def analysis_history(entries, words=250, seed=0):
+    """Build a response history like the app's session state"""
+    rng = random.Random(seed)
+    return [
+        {
+            "type": f"Analysis {index}",
+            "timestamp": f"10:{index // 60 % 60:02d}:{index % 60:02d}",
+            "response": " ".join(rng.choice(SKILLS + VERBS + NOUNS) for _ in range(words))
+        }
+        for index in range(entries)
+    ]
@@ -0,0 +1,279 @@
+"""Load test: many concurrent simulated users driving app.py through Streamlit's AppTest.
+
+Each simulated user loads the page, gives consent, enters a job description,
+uploads a resume, runs analyses, waits for the background jobs and downloads
+every export format. All users share one process, like sessions on one
+Streamlit server, and Gemini is replaced by the latency stub. For each user
+count the report gives rerun latency percentiles, throughput and peak RSS.
+
+AppTest keeps the Streamlit runtime in a process-wide global, so script runs
+are serialized; background jobs, Gemini latency and polling still overlap.
+Rerun latency includes the wait for the script runner (standing in for GIL
+contention on a real server), service time is the run alone, and
+script_utilization near 1.0 means the process is saturated.
+
+    python benchmarks/load_test.py --users 1 4 16 32 --latency lognormal:0.5,0.4 --output load.json
+    python benchmarks/load_test.py --users 8 --baseline load.json   # exit 1 on a p95 regression
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app reads these at import; keep quotas out of the way of the measurement
+os.environ.setdefault("GOOGLE_API_KEY", "load-test")
+os.environ.setdefault("API_CALL_LIMIT", "1000000")
+os.environ.setdefault("GEMINI_RPM", "1000000")
+os.environ.setdefault("GEMINI_TPM", "1000000000")
+
+from benchmarks.bench_suite import summarize  # noqa: E402
+from benchmarks.fixtures import job_description, resume_pdf  # noqa: E402
+from benchmarks.stub_genai import install  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "app.py")
+ANALYSES = ("🎯 Match Percentage", "✨ Resume Overview", "📊 Run Full Report")
+# More users than this adding less than this much throughput marks the saturation point
+SATURATION_GAIN = 1.1
+
+# AppTest swaps a process-wide Runtime instance on every run, so runs cannot overlap
+RUN_LOCK = threading.Lock()
+
+
+def current_rss():
+    """Resident set size of this process in bytes; the peak so far where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """Track the peak resident set size from a background thread while in use"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.baseline = self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.baseline = self.peak = current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+class SimulatedUser:
+    """One browser session driving its own AppTest instance"""
+
+    def __init__(self, pdf_bytes, job_desc, args):
+        from streamlit.testing.v1 import AppTest
+
+        self.pdf_bytes = pdf_bytes
+        self.job_desc = job_desc
+        self.args = args
+        self.at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+        self.reruns = []
+        self.exports = []
+
+    def rerun(self, step):
+        start = time.perf_counter()
+        with RUN_LOCK:
+            started = time.perf_counter()
+            self.at.run()
+            finished = time.perf_counter()
+        self.reruns.append((step, finished - start, finished - started))
+        if self.at.exception:
+            raise RuntimeError(f"{step}: {self.at.exception[0].value}")
+
+    def click(self, label):
+        next(button for button in self.at.button if button.label == label).click()
+        self.rerun(label)
+
+    def wait_for_jobs(self):
+        """Rerun at the jobs panel's refresh interval until no job can be cancelled"""
+        deadline = time.monotonic() + self.args.job_timeout
+        while any(button.label == "Cancel" for button in self.at.button):
+            if time.monotonic() > deadline:
+                raise TimeoutError("background jobs did not finish")
+            time.sleep(self.args.poll_interval)
+            self.rerun("poll")
+
+    def download(self):
+        """Build every export of the session history the way the download buttons do"""
+        from exports import EXPORT_FORMATS, cached_export
+
+        history = self.at.session_state["response_history"]
+        for fmt in EXPORT_FORMATS:
+            start = time.perf_counter()
+            cached_export(history.exports, history.version, list(history), fmt)
+            self.exports.append(time.perf_counter() - start)
+
+    def run_scenario(self):
+        self.rerun("load")
+        next(box for box in self.at.checkbox if box.label.startswith("I consent")).check()
+        self.rerun("consent")
+        self.at.text_area(key="job_desc").input(self.job_desc)
+        self.rerun("job_description")
+        self.at.file_uploader[0].set_value(("resume.pdf", self.pdf_bytes, "application/pdf"))
+        self.rerun("upload")
+        for label in self.args.analyses:
+            self.click(label)
+            self.wait_for_jobs()
+        self.download()
+
+
+def run_level(users, first_seed, args):
+    """Run one scenario per user concurrently and summarize the server-side cost"""
+    # Distinct inputs per user so the response cache does not hide the work
+    inputs = [
+        (resume_pdf(args.pages, seed=first_seed + index), job_description(args.jd_words, seed=first_seed + index))
+        for index in range(users)
+    ]
+
+    def simulate(index):
+        time.sleep(args.ramp * index / users)
+        user = SimulatedUser(*inputs[index], args)
+        try:
+            user.run_scenario()
+            return user, None
+        except Exception as e:
+            return user, e
+
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users) as pool:
+            results = list(pool.map(simulate, range(users)))
+        elapsed = time.perf_counter() - start
+
+    reruns = [seconds for user, _ in results for _, seconds, _ in user.reruns]
+    service = [seconds for user, _ in results for _, _, seconds in user.reruns]
+    by_step = {}
+    for user, _ in results:
+        for step, seconds, _ in user.reruns:
+            by_step.setdefault(step, []).append(seconds)
+    exports = [seconds for user, _ in results for seconds in user.exports]
+    errors = [f"{type(error).__name__}: {error}" for _, error in results if error is not None]
+    return {
+        "users": users,
+        "completed": users - len(errors),
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "reruns": len(reruns),
+        "throughput_rps": len(reruns) / elapsed,
+        "scenarios_per_minute": 60 * (users - len(errors)) / elapsed,
+        "rerun_latency": summarize(reruns) if reruns else None,
+        "rerun_service": summarize(service) if service else None,
+        "script_utilization": sum(service) / elapsed,
+        "rerun_latency_by_step": {step: summarize(samples) for step, samples in by_step.items()},
+        "export_latency": summarize(exports) if exports else None,
+        "baseline_rss_mb": rss.baseline / 2 ** 20,
+        "peak_rss_mb": rss.peak / 2 ** 20,
+    }
+
+
+def saturation_point(levels):
+    """Return the user count past which more users stop adding throughput, or None"""
+    for previous, level in zip(levels, levels[1:]):
+        if level["throughput_rps"] < previous["throughput_rps"] * SATURATION_GAIN:
+            return previous["users"]
+    return None
+
+
+def regressions(levels, baseline_path, tolerance):
+    """Compare p95 rerun latency against a previous report; returns failure messages"""
+    with open(baseline_path) as f:
+        baseline = {level["users"]: level for level in json.load(f)["levels"]}
+    failures = []
+    for level in levels:
+        previous = baseline.get(level["users"])
+        if previous is None or not previous["rerun_latency"] or not level["rerun_latency"]:
+            continue
+        before, after = previous["rerun_latency"]["p95"], level["rerun_latency"]["p95"]
+        if after > before * (1 + tolerance):
+            failures.append(f"{level['users']} users: p95 rerun latency {after:.3f}s vs baseline {before:.3f}s")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16], help="concurrent user counts to run")
+    parser.add_argument("--latency", default="lognormal:0.5,0.4",
+                        help="stub Gemini latency: fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--pages", type=int, default=2, help="pages per synthetic resume")
+    parser.add_argument("--jd-words", type=int, default=400, help="words per synthetic job description")
+    parser.add_argument("--analyses", nargs="+", default=list(ANALYSES), help="button labels each user clicks")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which users start")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between reruns while jobs run")
+    parser.add_argument("--job-timeout", type=float, default=120.0, help="seconds to wait for a user's jobs")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per rerun")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="previous JSON report; exit 1 if p95 rerun latency regressed")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 increase over the baseline")
+    args = parser.parse_args()
+
+    from streamlit import logger
+
+    # Simulated users run without a Streamlit server; hide the bare-mode warnings this causes
+    logger.set_log_level("error")
+    install(args.latency)
+    levels = []
+    first_seed = 0
+    for users in args.users:
+        levels.append(run_level(users, first_seed, args))
+        first_seed += users
+        print(
+            f"{users} users: {levels[-1]['throughput_rps']:.1f} reruns/s, "
+            f"p95 {levels[-1]['rerun_latency']['p95'] if levels[-1]['rerun_latency'] else float('nan'):.3f}s, "
+            f"script utilization {levels[-1]['script_utilization']:.0%}, peak RSS {levels[-1]['peak_rss_mb']:.0f} MB, "
+            f"{len(levels[-1]['errors'])} errors",
+            file=sys.stderr
+        )
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "levels": levels,
+        "saturation_users": saturation_point(levels),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        failures = regressions(levels, args.baseline, args.tolerance)
+        for failure in failures:
+            print(f"Regression: {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Local stand-in for google.generativeai.GenerativeModel with configurable latency.
+
+    from benchmarks.stub_genai import install
+    install("lognormal:0.3,0.5")
+
+Latency specs are "fixed:SECONDS", "uniform:LOW,HIGH" or
+"lognormal:MEDIAN,SIGMA". Responses contain a match percentage so the
+app's parsing paths are exercised; structured (JSON schema) requests get
+a JSON report.
+"""
+import json
+import math
+import random
+import threading
+import time
+
+RESPONSE_TEXT = (
+    "**Match percentage: 72%**\n\n"
+    "Strengths: Python, Django and AWS experience line up with the role.\n\n"
+    "Gaps: no Kubernetes or Terraform mentioned; add measurable outcomes to recent projects."
+)
+STRUCTURED_RESPONSE = json.dumps({
+    "overview": "Strong backend profile with relevant cloud experience.",
+    "skill_improvement": "Add Kubernetes and Terraform projects.",
+    "missing_keywords": ["kubernetes", "terraform"],
+    "match_percentage": 72,
+    "match_explanation": "Most core requirements are covered.",
+    "interview_likelihood": "Maybe",
+    "interview_explanation": "Infrastructure-as-code experience is missing."
+})
+STREAM_CHUNKS = 8
+
+
+def parse_latency(spec):
+    """Return a zero-argument sampler for a latency spec"""
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    rng = random.Random(0)
+    lock = threading.Lock()
+
+    def locked(fn):
+        def sample():
+            with lock:
+                return max(0.0, fn())
+        return sample
+
+    if kind == "fixed":
+        return locked(lambda: values[0])
+    if kind == "uniform":
+        return locked(lambda: rng.uniform(values[0], values[1]))
+    if kind == "lognormal":
+        return locked(lambda: rng.lognormvariate(math.log(values[0]), values[1]))
+    raise ValueError(f"Unknown latency distribution {spec!r}")
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGenerativeModel:
+    """Drop-in GenerativeModel that sleeps for a sampled latency instead of calling the API"""
+
+    latency = staticmethod(parse_latency("fixed:0"))
+    response_text = RESPONSE_TEXT
+    calls = 0
+    _lock = threading.Lock()
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, contents, stream=False, request_options=None, **kwargs):
+        with StubGenerativeModel._lock:
+            StubGenerativeModel.calls += 1
+        delay = self.latency()
+        if not stream:
+            time.sleep(delay)
+            if (kwargs.get("generation_config") or {}).get("response_mime_type") == "application/json":
+                return _Chunk(STRUCTURED_RESPONSE)
+            return _Chunk(self.response_text)
+        return self._stream(delay)
+
+    def _stream(self, delay):
+        size = -(-len(self.response_text) // STREAM_CHUNKS)
+        for start in range(0, len(self.response_text), size):
+            time.sleep(delay / STREAM_CHUNKS)
+            yield _Chunk(self.response_text[start:start + size])
+
+
+def install(latency_spec="fixed:0"):
+    """Replace genai.GenerativeModel with the stub and return the stub class"""
+    import google.generativeai as genai
+
+    StubGenerativeModel.latency = staticmethod(parse_latency(latency_spec))
+    StubGenerativeModel.calls = 0
+    genai.GenerativeModel = StubGenerativeModel
+    return StubGenerativeModel
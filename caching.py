@@ -0,0 +1,170 @@
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def content_digest(data):
+    """Return a stable hex digest for bytes or text content"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class ByteBoundedLRU:
+    """Thread-safe LRU cache evicting least recently used entries by total size in bytes"""
+
+    def __init__(self, max_bytes, sizeof=sys.getsizeof):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            # Values larger than the whole budget are never retained
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+def response_cache_key(model_name, prompt, resume_text, job_desc):
+    """Build a cache key from the model, normalized prompt and input digests"""
+    normalized_prompt = " ".join(prompt.split())
+    parts = [model_name, content_digest(normalized_prompt), content_digest(resume_text), content_digest(job_desc.strip())]
+    return content_digest("\x1f".join(parts))
+
+
+class ResponseCache:
+    """Two-tier LLM response cache: in-memory LRU backed by an optional SQLite file, both with TTL.
+
+    Expired and excess SQLite rows are pruned on open and then every
+    prune_every puts, so the file may briefly hold up to prune_every rows
+    more than max_disk_entries.
+    """
+
+    def __init__(self, max_memory_bytes, ttl_seconds, db_path=None, max_disk_entries=10000, prune_every=100):
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = prune_every
+        self._puts = 0
+        self.memory = ByteBoundedLRU(max_memory_bytes, sizeof=lambda entry: sys.getsizeof(entry[0]))
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses "
+                    "(key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+                self._prune(conn, time.time())
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _fresh(self, created):
+        return time.time() - created <= self.ttl_seconds
+
+    def get(self, key):
+        entry = self.memory.get(key)
+        if entry is not None and self._fresh(entry[1]):
+            with self._lock:
+                self.memory_hits += 1
+            return entry[0]
+
+        if self.db_path:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT response, created FROM responses WHERE key = ? AND created >= ?",
+                    (key, time.time() - self.ttl_seconds),
+                ).fetchone()
+            if row is not None:
+                self.memory.put(key, (row[0], row[1]))
+                with self._lock:
+                    self.disk_hits += 1
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _prune(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM responses WHERE key NOT IN "
+            "(SELECT key FROM responses ORDER BY created DESC LIMIT ?)",
+            (self.max_disk_entries,),
+        )
+
+    def put(self, key, response):
+        created = time.time()
+        self.memory.put(key, (response, created))
+        if self.db_path:
+            with self._lock:
+                self._puts += 1
+                prune = self._puts % self.prune_every == 0
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                    (key, response, created),
+                )
+                if prune:
+                    self._prune(conn, created)
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def stats(self):
+        """Return hit/miss counters for display"""
+        lookups = self.hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
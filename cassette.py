@@ -0,0 +1,135 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+CASSETTE_MODES = ("record", "replay")
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a request was never recorded"""
+
+
+class _Recorded:
+    """Minimal stand-in for a generate_content response or stream chunk"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+def request_key(model_name, contents, stream, kwargs):
+    """Hash a generate_content request; request_options such as timeouts are not part of the key"""
+    payload = json.dumps(
+        {"model": model_name, "contents": contents, "stream": stream, "kwargs": kwargs},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Gzipped JSON-lines file of recorded Gemini requests, keyed by request hash.
+
+    In record mode every successful generate_content call is appended along
+    with its latency (and chunk timings for streams). In replay mode responses
+    are served from the file without touching the network, optionally
+    sleeping for the recorded latencies.
+    """
+
+    def __init__(self, path, mode, replay_latency=False):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Cassette mode must be one of {CASSETTE_MODES}, not {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.hits = 0
+        self.recorded = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._entries[entry["key"]] = entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def record(self, entry):
+        """Append an entry; each write is a separate gzip member so the file stays valid"""
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+            self.recorded += 1
+
+    def lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                raise CassetteMiss(f"No recorded Gemini response for request {key[:12]} in {self.path}")
+            self.hits += 1
+            return entry
+
+    def wrap(self, model_name, model):
+        """Return a model that records through to the real model, or replays without one"""
+        if self.mode == "record":
+            return RecordingModel(self, model_name, model)
+        return ReplayModel(self, model_name)
+
+
+class RecordingModel:
+    """Forwards generate_content to the real model and records each response"""
+
+    def __init__(self, cassette, model_name, model):
+        self.cassette = cassette
+        self.model_name = model_name
+        self.model = model
+
+    def generate_content(self, contents, stream=False, request_options=None, **kwargs):
+        key = request_key(self.model_name, contents, stream, kwargs)
+        start = time.monotonic()
+        response = self.model.generate_content(contents, stream=stream, request_options=request_options, **kwargs)
+        if stream:
+            return self._record_stream(key, response, start)
+        text = response.text
+        self.cassette.record({
+            "key": key, "model": self.model_name, "stream": False,
+            "text": text, "latency": time.monotonic() - start
+        })
+        return response
+
+    def _record_stream(self, key, response, start):
+        chunks = []
+        for chunk in response:
+            chunks.append([time.monotonic() - start, chunk.text])
+            yield chunk
+        self.cassette.record({
+            "key": key, "model": self.model_name, "stream": True,
+            "chunks": chunks, "latency": time.monotonic() - start
+        })
+
+
+class ReplayModel:
+    """Serves recorded responses for a model without any network access"""
+
+    def __init__(self, cassette, model_name):
+        self.cassette = cassette
+        self.model_name = model_name
+
+    def generate_content(self, contents, stream=False, request_options=None, **kwargs):
+        entry = self.cassette.lookup(request_key(self.model_name, contents, stream, kwargs))
+        if stream:
+            return self._replay_stream(entry)
+        if self.cassette.replay_latency:
+            time.sleep(entry["latency"])
+        return _Recorded(entry["text"])
+
+    def _replay_stream(self, entry):
+        start = time.monotonic()
+        for offset, text in entry["chunks"]:
+            if self.cassette.replay_latency:
+                time.sleep(max(0.0, offset - (time.monotonic() - start)))
+            yield _Recorded(text)
@@ -0,0 +1,150 @@
+"""Headless bulk analysis: run ResumeRankr analyses from a JSONL manifest without Streamlit.
+
+Each manifest line is a JSON object such as
+
+    {"id": "c-1", "resume": "resumes/alice.pdf", "job_description": "jobs/backend.txt",
+     "analyses": ["submit4", "local"]}
+
+where analyses are keys of core.PROMPTS, "report" for every analysis from one
+structured call, or "local" for the offline keyword score. One JSON result per analysis is written to stdout as soon as it
+finishes, in completion order.
+"""
+import argparse
+import json
+import sys
+from functools import lru_cache
+
+from batch import CallBudget, run_bounded
+from core import (ANALYSIS_LABELS, METRICS_FILE, PROMPTS, CallOptions, cached_gemini_call, create_extraction_cache,
+                  create_gemini_client, create_model_router, create_rate_limiter, create_response_cache,
+                  create_section_cache, model_options, parse_match_percentage, resume_for_prompt, scan_pdf_bytes,
+                  start_metrics_exporters, structured_report_call)
+from metrics import METRICS
+from scoring import score_resume
+
+LOCAL_ANALYSIS = "local"
+REPORT_ANALYSIS = "report"
+LABELS = {**ANALYSIS_LABELS, LOCAL_ANALYSIS: "Local Match Score", REPORT_ANALYSIS: "Full Report"}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run ResumeRankr analyses for every resume in a JSONL manifest.")
+    parser.add_argument("manifest", help="JSONL manifest path, or - to read from stdin")
+    parser.add_argument("--model", default="gemini-1.5-flash", choices=sorted(model_options.values()),
+                        help="Gemini model to use, or auto to pick one per analysis (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=4, help="analyses in flight at once (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds to wait for each analysis")
+    parser.add_argument("--max-calls", type=int, default=None, help="stop making Gemini calls after this many")
+    parser.add_argument("--no-compact", action="store_true", help="send resume and job description text untrimmed")
+    return parser.parse_args(argv)
+
+
+def iter_manifest(lines):
+    """Yield manifest entries, skipping blank lines"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise SystemExit(f"Manifest line {number} is not valid JSON: {e}")
+
+
+@lru_cache(maxsize=None)
+def read_text(path):
+    """Read a job description file once, however many resumes share it"""
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def iter_tasks(entries):
+    """Yield one (entry, analysis) task per requested analysis"""
+    for entry in entries:
+        for analysis in entry.get("analyses") or [LOCAL_ANALYSIS]:
+            yield entry, analysis
+
+
+def run_task(task, options, extraction_cache, section_cache):
+    """Run a single analysis and return its result fields"""
+    entry, analysis = task
+    with open(entry["resume"], "rb") as f:
+        pdf_bytes = f.read()
+    result = scan_pdf_bytes(pdf_bytes, extraction_cache, None)
+    if result.sensitive_rule is not None:
+        raise ValueError(f"Resume may contain sensitive personal information ({result.sensitive_rule})")
+    job_desc = read_text(entry["job_description"])
+
+    if analysis == LOCAL_ANALYSIS:
+        local = score_resume(result.text, job_desc)
+        return {
+            "response": None,
+            "match_percentage": local.score,
+            "matched_terms": local.matched_terms,
+            "missing_terms": local.missing_terms,
+            "duration": 0.0,
+            "cached": False
+        }
+    if analysis == REPORT_ANALYSIS:
+        call = structured_report_call(options, result.text, job_desc)
+        return {
+            "response": call.result._asdict(),
+            "match_percentage": call.result.match_percentage,
+            "duration": round(call.duration, 3),
+            "cached": call.cached
+        }
+    if analysis not in PROMPTS:
+        raise ValueError(f"Unknown analysis {analysis!r}")
+
+    resume_text = resume_for_prompt(analysis, result.text, pdf_bytes, section_cache) if options.compact else result.text
+    response_text, duration, cached = cached_gemini_call(options, PROMPTS[analysis], resume_text, job_desc, task=analysis)
+    return {
+        "response": response_text,
+        "match_percentage": parse_match_percentage(response_text) if analysis == "submit4" else None,
+        "duration": round(duration, 3),
+        "cached": cached
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = CallOptions(
+        model_name=args.model,
+        session_id="cli",
+        client=create_gemini_client(),
+        rate_limiter=create_rate_limiter(),
+        response_cache=create_response_cache(),
+        budget=CallBudget(float("inf") if args.max_calls is None else args.max_calls),
+        compact=not args.no_compact,
+        router=create_model_router()
+    )
+    extraction_cache = create_extraction_cache()
+    section_cache = create_section_cache()
+    start_metrics_exporters()
+
+    manifest = sys.stdin if args.manifest == "-" else open(args.manifest, encoding="utf-8")
+    failures = 0
+    with manifest:
+        tasks = iter_tasks(iter_manifest(manifest))
+        for (entry, analysis), fields, error in run_bounded(
+            lambda task: run_task(task, options, extraction_cache, section_cache), tasks, args.concurrency, timeout=args.timeout
+        ):
+            record = {
+                "id": entry.get("id"),
+                "resume": entry.get("resume"),
+                "analysis": analysis,
+                "label": LABELS.get(analysis)
+            }
+            if error is None:
+                record.update(fields)
+                record["error"] = None
+            else:
+                failures += 1
+                record["error"] = str(error)
+            print(json.dumps(record), flush=True)
+    if METRICS_FILE:
+        METRICS.write_prometheus(METRICS_FILE)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
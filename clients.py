@@ -0,0 +1,185 @@
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ThreadPoolExecutor, wait
+
+from google.api_core import exceptions as google_exceptions
+
+# Transient failures worth retrying with backoff
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    ConnectionError,
+)
+
+# Latency samples kept per model for the hedging threshold
+LATENCY_WINDOW = 200
+
+
+class GeminiClient:
+    """Pooled Gemini model clients with retries, per-call deadlines and optional hedged requests.
+
+    Model objects are created once per model name and shared by all callers.
+    Retryable errors are retried with exponential backoff and full jitter
+    until max_retries or the call deadline is reached. With hedging enabled,
+    a call still running after the model's observed p95 latency triggers a
+    duplicate request (to hedge_model, if set) and the first answer wins;
+    the other stops retrying. Callers pass before_request to charge each
+    retry or hedge (model_name, "retry" or "hedge") to their quota; it may
+    block, or raise to stop the extra request. With a cassette, calls are
+    recorded to it or replayed from it.
+    """
+
+    def __init__(self, api_key=None, max_retries=3, base_delay=0.5, max_delay=8.0, deadline=60.0,
+                 hedge=False, hedge_model=None, hedge_min_samples=20, hedge_workers=16, cassette=None):
+        self.api_key = api_key
+        self.cassette = cassette
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_model = hedge_model
+        self.hedge_min_samples = hedge_min_samples
+        self.hedged_calls = 0
+        self._models = {}
+        self._latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=hedge_workers) if hedge else None
+
+    def model(self, model_name):
+        """Return the shared GenerativeModel for model_name"""
+        with self._lock:
+            if model_name not in self._models:
+                if self.cassette is not None and self.cassette.mode == "replay":
+                    self._models[model_name] = self.cassette.wrap(model_name, None)
+                    return self._models[model_name]
+                # Imported lazily: the SDK is slow to import and not needed for cached or local work
+                import google.generativeai as genai
+                if not self._models:
+                    genai.configure(api_key=self.api_key)
+                model = genai.GenerativeModel(model_name)
+                self._models[model_name] = model if self.cassette is None else self.cassette.wrap(model_name, model)
+            return self._models[model_name]
+
+    def p95_latency(self, model_name):
+        """Return the p95 of recent successful call latencies, or None with too few samples"""
+        with self._lock:
+            samples = sorted(self._latencies[model_name])
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+    def _record_latency(self, model_name, seconds):
+        with self._lock:
+            self._latencies[model_name].append(seconds)
+
+    def _backoff(self, attempt, deadline_at):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if time.monotonic() + delay >= deadline_at:
+            return False
+        time.sleep(delay)
+        return True
+
+    def _remaining(self, deadline_at):
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Gemini call exceeded the {self.deadline:g} second deadline")
+        return remaining
+
+    def _generate_with_retries(self, model_name, contents, deadline_at, before_request=None, stop=None,
+                               first_kind=None, **kwargs):
+        # first_kind is "hedge" for a hedged request, so its first request is charged as well
+        kind, attempt = first_kind, 0
+        while True:
+            if kind is not None and before_request is not None:
+                before_request(model_name, kind)
+            if stop is not None and stop.is_set():
+                raise CancelledError("Another request already answered")
+            start = time.monotonic()
+            try:
+                response = self.model(model_name).generate_content(
+                    contents, request_options={"timeout": self._remaining(deadline_at)}, **kwargs
+                )
+                text = response.text
+            except RETRYABLE_ERRORS:
+                stopped = stop is not None and stop.is_set()
+                if stopped or attempt >= self.max_retries or not self._backoff(attempt, deadline_at):
+                    raise
+                attempt += 1
+                kind = "retry"
+                continue
+            self._record_latency(model_name, time.monotonic() - start)
+            return text
+
+    def generate(self, model_name, contents, before_request=None, **kwargs):
+        """Generate a full response and return its text"""
+        deadline_at = time.monotonic() + self.deadline
+        hedge_after = self.p95_latency(model_name) if self.hedge else None
+        if hedge_after is None:
+            return self._generate_with_retries(model_name, contents, deadline_at, before_request, **kwargs)
+
+        stop = threading.Event()
+        primary = self._executor.submit(
+            self._generate_with_retries, model_name, contents, deadline_at, before_request, stop, **kwargs
+        )
+        done, _ = wait([primary], timeout=min(hedge_after, self._remaining(deadline_at)))
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self.hedged_calls += 1
+        hedge_model = self.hedge_model or model_name
+        hedge = self._executor.submit(
+            self._generate_with_retries, hedge_model, contents, deadline_at, before_request, stop, "hedge", **kwargs
+        )
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=self._remaining(deadline_at), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            # A request already sent cannot be recalled, but the loser makes no further attempts
+            stop.set()
+            hedge.cancel()
+
+    def stream(self, model_name, contents, on_chunk, before_request=None):
+        """Stream a response, calling on_chunk with the text so far.
+
+        Retries are only attempted before the first chunk arrives. Returns
+        (text, time_to_first_token, total_duration).
+        """
+        deadline_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            if attempt and before_request is not None:
+                before_request(model_name, "retry")
+            start = time.monotonic()
+            first_token = None
+            parts = []
+            try:
+                response = self.model(model_name).generate_content(
+                    contents, stream=True, request_options={"timeout": self._remaining(deadline_at)}
+                )
+                for chunk in response:
+                    if first_token is None:
+                        first_token = time.monotonic() - start
+                    parts.append(chunk.text)
+                    on_chunk("".join(parts))
+            except RETRYABLE_ERRORS:
+                if parts or attempt >= self.max_retries or not self._backoff(attempt, deadline_at):
+                    raise
+                attempt += 1
+                continue
+            duration = time.monotonic() - start
+            self._record_latency(model_name, duration)
+            return "".join(parts), duration if first_token is None else first_token, duration
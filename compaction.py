@@ -0,0 +1,163 @@
+import re
+from collections import Counter
+from typing import NamedTuple
+
+# Rough characters-per-token ratio for Gemini models on English text
+CHARS_PER_TOKEN = 4
+
+# Job description lines that rarely change an analysis (EEO statements, benefits, legal text)
+BOILERPLATE_PATTERNS = [
+    r"equal (?:employment )?opportunity",
+    r"without regard to (?:race|color|religion|sex|gender|age|national origin|disability)",
+    r"affirmative action",
+    r"reasonable accommodations?",
+    r"e-?verify",
+    r"\b401\s?\(?k\)?",
+    r"paid time off|\bpto\b|parental leave|tuition reimbursement",
+    r"(?:medical|dental|vision|health) (?:insurance|coverage|benefits)",
+    r"competitive (?:salary|compensation|benefits)",
+    r"benefits (?:include|package)",
+    r"(?:do not|don't) accept unsolicited (?:resumes|agency)",
+]
+BOILERPLATE_RE = re.compile("|".join(BOILERPLATE_PATTERNS), re.IGNORECASE)
+
+# Page numbers and similar per-page furniture
+PAGE_FURNITURE_RE = re.compile(r"^(?:page\s+)?\d+(?:\s*(?:of|/)\s*\d+)?$", re.IGNORECASE)
+
+# Separates pages in extracted text; a form feed still counts as a line break for splitlines()
+PAGE_BREAK = "\f"
+
+# Lines this close to the top or bottom of a page may be a running header or footer
+PAGE_EDGE_LINES = 2
+
+# Resume sections in the order they are kept when trimming to a budget
+SECTION_PRIORITY = ["skills", "experience", "summary", "projects", "certifications", "education", "other"]
+SECTION_HEADINGS = {
+    "summary": r"summary|profile|objective|about me",
+    "experience": r"(?:work |professional )?experience|employment(?: history)?|work history",
+    "skills": r"(?:technical |core )?skills|competencies|technologies|tools",
+    "education": r"education|academic background",
+    "certifications": r"certifications?|licenses?|courses",
+    "projects": r"projects?",
+}
+# Lines of every section kept before lower-priority sections are cut entirely
+SECTION_HEAD_LINES = 3
+SECTION_HEADING_RE = {
+    name: re.compile(rf"^(?:{pattern})\s*:?$", re.IGNORECASE) for name, pattern in SECTION_HEADINGS.items()
+}
+# Heading keywords anywhere in a line, for styled headings such as "Professional Summary" or "Key Skills"
+SECTION_KEYWORD_RE = {
+    name: re.compile(rf"\b(?:{pattern})\b", re.IGNORECASE) for name, pattern in SECTION_HEADINGS.items()
+}
+
+
+class CompactionStats(NamedTuple):
+    tokens_before: int
+    tokens_after: int
+
+
+def count_tokens(text):
+    """Estimate the token count of text locally, without an API call"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def repeated_page_edges(pages):
+    """Return the lowercased lines found at the top or bottom of more than one page"""
+    counts = Counter()
+    for page in pages:
+        counts.update({line.lower() for line in page[:PAGE_EDGE_LINES] + page[-PAGE_EDGE_LINES:]})
+    return {line for line, count in counts.items() if count > 1}
+
+
+def clean_lines(text, strip_boilerplate=False):
+    """Normalize whitespace and drop page numbers, repeated page headers and footers and optional boilerplate.
+
+    Only the first copy of a line repeated at the edges of several pages is
+    kept; other repeated lines are left alone.
+    """
+    pages = []
+    for page in text.split(PAGE_BREAK):
+        page_lines = (" ".join(line.split()) for line in page.splitlines())
+        pages.append([line for line in page_lines if line and not PAGE_FURNITURE_RE.match(line)])
+    headers = repeated_page_edges(pages) if len(pages) > 1 else set()
+    seen = set()
+    lines = []
+    for line in (line for page in pages for line in page):
+        if strip_boilerplate and BOILERPLATE_RE.search(line):
+            continue
+        key = line.lower()
+        if key in headers:
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return lines
+
+
+def split_sections(lines):
+    """Group resume lines into (section_name, lines) pairs using common heading names"""
+    sections = [("other", [])]
+    for line in lines:
+        name = next((name for name, pattern in SECTION_HEADING_RE.items() if pattern.match(line)), None)
+        if name is not None:
+            sections.append((name, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, section_lines) for name, section_lines in sections if section_lines]
+
+
+def trim_to_budget(lines, budget):
+    """Trim resume lines to a token budget, keeping the original line order.
+
+    Every section first keeps its opening lines, then the remaining budget is
+    filled section by section in SECTION_PRIORITY order. A line longer than
+    what is left of the budget is cut down to fit rather than dropped.
+    """
+    sections = split_sections(lines)
+    order = sorted(range(len(sections)), key=lambda i: SECTION_PRIORITY.index(sections[i][0]))
+    kept = [0] * len(sections)
+    cut = {}
+    remaining = budget
+    for limit in (SECTION_HEAD_LINES, None):
+        for i in order:
+            section_lines = sections[i][1]
+            stop = len(section_lines) if limit is None else min(limit, len(section_lines))
+            while kept[i] < stop:
+                cost = count_tokens(section_lines[kept[i]]) + 1
+                if cost > remaining:
+                    # Opening lines only take what fits whole; the fill pass cuts the line to the rest
+                    if limit is None and remaining > 1:
+                        cut[i] = section_lines[kept[i]][:(remaining - 1) * CHARS_PER_TOKEN]
+                        remaining = 0
+                    break
+                remaining -= cost
+                kept[i] += 1
+    return [
+        line
+        for i, (_, section_lines) in enumerate(sections)
+        for line in section_lines[:kept[i]] + ([cut[i]] if i in cut else [])
+    ]
+
+
+def compact_inputs(resume_text, job_desc, token_budget, job_desc_share=0.4):
+    """Compact resume and job description text to fit a combined token budget.
+
+    The job description may use up to job_desc_share of the budget and the
+    resume gets the rest, trimmed section by section in SECTION_PRIORITY order.
+    Returns (resume_text, job_desc, CompactionStats).
+    """
+    tokens_before = count_tokens(resume_text) + count_tokens(job_desc)
+
+    job_lines = clean_lines(job_desc, strip_boilerplate=True)
+    job_text = "\n".join(job_lines)
+    job_budget = int(token_budget * job_desc_share)
+    if count_tokens(job_text) > job_budget:
+        job_text = job_text[:job_budget * CHARS_PER_TOKEN].rsplit("\n", 1)[0]
+
+    resume_lines = clean_lines(resume_text)
+    resume_budget = token_budget - count_tokens(job_text)
+    if count_tokens("\n".join(resume_lines)) > resume_budget:
+        resume_lines = trim_to_budget(resume_lines, resume_budget)
+    resume_text = "\n".join(resume_lines)
+
+    return resume_text, job_text, CompactionStats(tokens_before, count_tokens(resume_text) + count_tokens(job_text))
@@ -0,0 +1,692 @@
+"""Core ResumeRankr analysis logic shared by the Streamlit app and the headless CLI.
+
+Nothing in this module imports Streamlit, so it can be used from batch jobs
+and scripts. Settings are read from the environment (and a .env file).
+"""
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+from dotenv import load_dotenv
+
+from batch import CallBudget
+from caching import ByteBoundedLRU, ResponseCache, content_digest, response_cache_key
+from cassette import Cassette
+from clients import GeminiClient
+from compaction import CompactionStats, compact_inputs, count_tokens
+from extraction import ExtractionLimits, create_process_pool, extract_pdf
+from history import ResponseHistory, SessionRegistry
+from jd_index import JobIndex
+from jobs import JobQueue
+from metrics import METRICS, configure_event_log, log_event, start_metrics_file_writer, start_metrics_server
+from ratelimit import GlobalRateLimiter, MemoryBucketStore, RateLimitTimeout, SQLiteBucketStore
+from resume_parser import parse_resume
+from routing import ModelRouter
+from scanner import DEFAULT_RULES, SensitiveDataScanner
+
+load_dotenv()
+
+# Model name that routes each request to a model picked by the ModelRouter
+AUTO_MODEL = "auto"
+
+# Gemini model options with descriptions
+model_options = {
+    "Gemini 2.0 Flash (Next-Gen Fast & Smart)": "gemini-2.0-flash",
+    "Gemini 2.0 Flash-Lite (Low Latency)": "gemini-2.0-flash-lite", 
+    "Gemini 1.5 Flash (Fast & Versatile)": "gemini-1.5-flash",
+    "Gemini 1.5 Flash-8B (High Volume)": "gemini-1.5-flash-8b",
+    "Gemini 1.5 Pro (Advanced Reasoning)": "gemini-1.5-pro",
+    "Auto (Picks a Model per Analysis)": AUTO_MODEL
+}
+
+# Combined resume and job description token budget per model when inputs are compacted
+MODEL_TOKEN_BUDGETS = {
+    "gemini-2.0-flash": 8000,
+    "gemini-2.0-flash-lite": 6000,
+    "gemini-1.5-flash": 8000,
+    "gemini-1.5-flash-8b": 4000,
+    "gemini-1.5-pro": 12000
+}
+DEFAULT_TOKEN_BUDGET = 8000
+
+# Candidate models per analysis for Auto routing, in order of preference; custom queries use "custom"
+MODEL_ROUTES = {
+    "submit1": ["gemini-2.0-flash", "gemini-1.5-flash", "gemini-2.0-flash-lite"],
+    "submit2": ["gemini-2.0-flash", "gemini-1.5-flash", "gemini-2.0-flash-lite"],
+    "submit3": ["gemini-2.0-flash-lite", "gemini-1.5-flash-8b", "gemini-2.0-flash"],
+    "submit4": ["gemini-2.0-flash-lite", "gemini-2.0-flash", "gemini-1.5-flash"],
+    "submit5": ["gemini-2.0-flash", "gemini-1.5-flash", "gemini-2.0-flash-lite"],
+    "report": ["gemini-2.0-flash", "gemini-1.5-pro", "gemini-1.5-flash"],
+    "custom": ["gemini-1.5-pro", "gemini-2.0-flash", "gemini-1.5-flash"]
+}
+
+# Prompts dictionary
+PROMPTS = {
+    "submit1": """
+        You are an experienced Technical Human Resource Manager. Your task is to review the provided resume 
+        against the job description. Highlight strengths and weaknesses in relation to the role.
+    """,
+    "submit2": """
+    You are a Technical HR Manager with experience in assessing skill development. Evaluate the resume against the job description.
+
+    Provide:
+    1. Skills that are relevant and strong.
+    2. Skills that are lacking or could be improved.
+    3. Specific suggestions to enhance the candidate's technical and soft skills for this role.
+    """,
+    "submit3": """
+        You are an ATS scanner with HR experience. Evaluate resume vs. job description, list missing keywords, 
+        and suggest skill improvements.
+    """,
+    "submit4": """
+    You are an intelligent ATS (Applicant Tracking System) scanner. Analyze the resume against the job description and provide the following:
+
+    1. An estimated **match percentage** between the resume and the job description.
+    2. A brief explanation of how this score was determined — highlight key strengths and gaps.
+    3. Keep your response short, structured, and easy to understand.
+    """,
+    "submit5": """
+    You are a professional Technical Recruiter. Carefully review the candidate's resume and compare it with the job description.
+
+    Provide:
+    1. A judgment on whether this candidate is likely to be shortlisted for an interview (Yes, Maybe, or Unlikely).
+    2. A brief explanation supporting your judgment based on relevant skills, experience, and alignment.
+    3. Any critical gaps that might lower the chances.
+    4. Suggestions to improve the chances of getting noticed or selected.
+    """
+}
+
+# One request that answers every analysis as JSON, so the resume and job description are sent once
+STRUCTURED_PROMPT = """
+    You are an experienced Technical HR Manager and ATS (Applicant Tracking System) scanner. Review the resume
+    against the job description and answer every field of the JSON response:
+
+    - overview: strengths and weaknesses of the resume in relation to the role.
+    - skill_improvement: relevant strong skills, lacking skills, and specific suggestions to improve them.
+    - missing_keywords: important job description keywords missing from the resume.
+    - match_percentage: estimated match between resume and job description, from 0 to 100.
+    - match_explanation: a brief explanation of how the match percentage was determined.
+    - interview_likelihood: whether the candidate is likely to be shortlisted (Yes, Maybe or Unlikely).
+    - interview_explanation: reasons for that judgment, critical gaps and suggestions to get noticed.
+    """
+STRUCTURED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "overview": {"type": "string"},
+        "skill_improvement": {"type": "string"},
+        "missing_keywords": {"type": "array", "items": {"type": "string"}},
+        "match_percentage": {"type": "integer"},
+        "match_explanation": {"type": "string"},
+        "interview_likelihood": {"type": "string", "enum": ["Yes", "Maybe", "Unlikely"]},
+        "interview_explanation": {"type": "string"}
+    },
+    "required": [
+        "overview", "skill_improvement", "missing_keywords", "match_percentage",
+        "match_explanation", "interview_likelihood", "interview_explanation"
+    ]
+}
+STRUCTURED_GENERATION_CONFIG = {"response_mime_type": "application/json", "response_schema": STRUCTURED_SCHEMA}
+
+# Resume sections each prompt needs; None sends the whole resume. Sections under
+# unrecognized headings are always sent, and the whole resume is sent when the kept
+# sections are less than PROMPT_SECTIONS_MIN_SHARE of it (the parse probably missed headings)
+PROMPT_SECTIONS_MIN_SHARE = 0.3
+PROMPT_SECTIONS = {
+    "submit1": None,
+    "submit2": ("summary", "skills", "experience", "projects", "education", "certifications"),
+    "submit3": ("summary", "skills", "experience", "projects", "education", "certifications"),
+    "submit4": None,
+    "submit5": ("summary", "skills", "experience", "education", "certifications")
+}
+
+# History labels for each analysis prompt
+ANALYSIS_LABELS = {
+    "submit1": "Resume Overview",
+    "submit2": "Skill Improvement",
+    "submit3": "Missing Keywords",
+    "submit4": "Match Percentage",
+    "submit5": "Interview Chances"
+}
+
+# Analyses that get an instant local keyword score before (or instead of) the LLM call
+LOCAL_SCORING_KEYS = ("submit3", "submit4")
+
+# Seconds to wait for each analysis when several run concurrently
+REPORT_CALL_TIMEOUT = float(os.getenv("REPORT_CALL_TIMEOUT", "60"))
+
+# Memory budget for cached PDF extraction results, shared by all sessions
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+# LLM response cache settings (set RESPONSE_CACHE_PATH to persist responses to SQLite)
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_MB", "32")) * 1024 * 1024
+RESPONSE_CACHE_TTL_HOURS = float(os.getenv("RESPONSE_CACHE_TTL_HOURS", "24"))
+RESPONSE_CACHE_MAX_ROWS = int(os.getenv("RESPONSE_CACHE_MAX_ROWS", "10000"))
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH")
+
+# On-disk job description library used by the Role Finder
+JOB_INDEX_PATH = os.getenv("JOB_INDEX_PATH", "job_index.json.gz")
+# The library is shared by all sessions; only users who enter this key may edit it (unset keeps it read-only)
+JOB_LIBRARY_ADMIN_KEY = os.getenv("JOB_LIBRARY_ADMIN_KEY", "")
+
+# Limits for PDF text extraction; set PDF_EXTRACT_WORKERS to extract large PDFs in a process pool
+EXTRACTION_LIMITS = ExtractionLimits(
+    max_pages=int(os.getenv("PDF_MAX_PAGES", "50")),
+    max_bytes=int(float(os.getenv("PDF_MAX_MB", "10")) * 1024 * 1024),
+    time_budget=float(os.getenv("PDF_TIME_BUDGET", "10")),
+    parallel_min_pages=int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))
+
+# Gemini client behaviour: retries with backoff, per-call deadline and optional hedged requests
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_CALL_DEADLINE = float(os.getenv("GEMINI_CALL_DEADLINE", "60"))
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "0") == "1"
+GEMINI_HEDGE_MODEL = os.getenv("GEMINI_HEDGE_MODEL") or None
+
+# Record Gemini calls to a cassette, or replay them without network access ("record", "replay" or unset)
+GEMINI_CASSETTE_MODE = os.getenv("GEMINI_CASSETTE_MODE") or None
+GEMINI_CASSETTE_PATH = os.getenv("GEMINI_CASSETTE_PATH", "gemini_cassette.jsonl.gz")
+GEMINI_CASSETTE_REPLAY_LATENCY = os.getenv("GEMINI_CASSETTE_REPLAY_LATENCY", "0") == "1"
+
+# Server-wide Gemini quota; set RATE_LIMIT_DB to share it between worker processes via SQLite
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB")
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "120"))
+# Output tokens reserved per request when checking the token quota
+EXPECTED_OUTPUT_TOKENS = 1000
+
+# Auto routing: EWMA smoothing factor, error rate at which a model counts as degraded, latency multiple over
+# the fastest candidate at which a model is passed over, and seconds after its last failure that a degraded
+# model is given another chance
+ROUTER_EWMA_ALPHA = float(os.getenv("ROUTER_EWMA_ALPHA", "0.2"))
+ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.3"))
+ROUTER_SLOW_FACTOR = float(os.getenv("ROUTER_SLOW_FACTOR", "2.0"))
+ROUTER_RECOVERY_SECONDS = float(os.getenv("ROUTER_RECOVERY_SECONDS", "60"))
+
+# Worker threads running analyses in the background for all sessions
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+# Most jobs one session may have running at once; its other jobs wait their turn
+JOB_SESSION_WORKERS = int(os.getenv("JOB_SESSION_WORKERS", str(len(PROMPTS))))
+
+# Per-session history cap; older responses beyond the newest few are kept zlib-compressed
+HISTORY_MAX_ENTRIES = int(os.getenv("HISTORY_MAX_ENTRIES", "50"))
+HISTORY_UNCOMPRESSED_ENTRIES = int(os.getenv("HISTORY_UNCOMPRESSED_ENTRIES", "5"))
+# Seconds between server-wide sweeps for expired sessions
+SESSION_REAP_INTERVAL = float(os.getenv("SESSION_REAP_INTERVAL", "60"))
+
+# Metrics export: Prometheus endpoint on METRICS_PORT, textfile at METRICS_FILE, JSON event log at
+# METRICS_JSON_LOG (a file path, or - for stderr)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_FILE = os.getenv("METRICS_FILE")
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+METRICS_JSON_LOG = os.getenv("METRICS_JSON_LOG")
+
+# Sensitive data scanner shared by all sessions (rules are pluggable, see scanner.DEFAULT_RULES)
+SENSITIVE_DATA_SCANNER = SensitiveDataScanner(DEFAULT_RULES)
+
+
+class StructuredReport(NamedTuple):
+    """Every analysis parsed from a single structured response"""
+    overview: str
+    skill_improvement: str
+    missing_keywords: list
+    match_percentage: int
+    match_explanation: str
+    interview_likelihood: str
+    interview_explanation: str
+
+    def history_entries(self):
+        """Return (label, response_text, fields) for each analysis, in ANALYSIS_LABELS order"""
+        keywords = "\n".join(f"- {keyword}" for keyword in self.missing_keywords) or "No important keywords missing."
+        return [
+            (ANALYSIS_LABELS["submit1"], self.overview, {}),
+            (ANALYSIS_LABELS["submit2"], self.skill_improvement, {}),
+            (ANALYSIS_LABELS["submit3"], keywords, {"missing_keywords": self.missing_keywords}),
+            (
+                ANALYSIS_LABELS["submit4"],
+                f"**Match percentage: {self.match_percentage}%**\n\n{self.match_explanation}",
+                {"match_percentage": self.match_percentage}
+            ),
+            (
+                ANALYSIS_LABELS["submit5"],
+                f"**Likely to be shortlisted: {self.interview_likelihood}**\n\n{self.interview_explanation}",
+                {"interview_likelihood": self.interview_likelihood}
+            ),
+        ]
+
+
+class CallOptions(NamedTuple):
+    """Settings for Gemini calls, captured up front so calls can run on worker threads"""
+    model_name: str
+    session_id: str
+    client: GeminiClient
+    rate_limiter: GlobalRateLimiter
+    response_cache: ResponseCache
+    budget: CallBudget
+    compact: bool
+    router: ModelRouter = None
+
+
+class CallResult(NamedTuple):
+    """A Gemini call's result with the model, input sizes and number of requests behind it"""
+    result: object
+    duration: float
+    cached: bool
+    model_name: str
+    compaction_stats: CompactionStats
+    # Requests sent to Gemini, counting retries, hedges and failed Auto attempts; 0 on a cache hit
+    requests: int = 0
+
+    def history_fields(self):
+        return response_stats(self.model_name, self.duration, self.compaction_stats, self.cached)
+
+
+def create_extraction_cache():
+    """Cache of extraction results keyed by PDF content hash"""
+    return ByteBoundedLRU(EXTRACTION_CACHE_MAX_BYTES, sizeof=lambda entry: sys.getsizeof(entry[0]))
+
+
+def create_section_cache():
+    """Cache of parsed resume sections keyed by PDF content hash"""
+    return ByteBoundedLRU(
+        EXTRACTION_CACHE_MAX_BYTES // 2,
+        sizeof=lambda parsed: sum(sys.getsizeof(section.text) for section in parsed.sections)
+    )
+
+
+def create_response_cache():
+    """Gemini response cache configured from the environment"""
+    return ResponseCache(
+        RESPONSE_CACHE_MAX_BYTES,
+        ttl_seconds=RESPONSE_CACHE_TTL_HOURS * 3600,
+        db_path=RESPONSE_CACHE_PATH,
+        max_disk_entries=RESPONSE_CACHE_MAX_ROWS
+    )
+
+
+def create_job_index():
+    """Job description index loaded from JOB_INDEX_PATH"""
+    return JobIndex(JOB_INDEX_PATH)
+
+
+def is_job_library_admin(key):
+    """Whether key unlocks editing the shared job library"""
+    return bool(JOB_LIBRARY_ADMIN_KEY) and hmac.compare_digest(key.encode("utf-8"), JOB_LIBRARY_ADMIN_KEY.encode("utf-8"))
+
+
+def create_extraction_pool():
+    """Process pool for parallel page extraction, or None when disabled"""
+    return create_process_pool(PDF_EXTRACT_WORKERS)
+
+
+def create_gemini_client():
+    """Pooled Gemini client with retries, deadlines, optional hedging and optional cassette"""
+    cassette = None
+    if GEMINI_CASSETTE_MODE:
+        cassette = Cassette(GEMINI_CASSETTE_PATH, GEMINI_CASSETTE_MODE, replay_latency=GEMINI_CASSETTE_REPLAY_LATENCY)
+    return GeminiClient(
+        api_key=os.getenv("GOOGLE_API_KEY"),
+        max_retries=GEMINI_MAX_RETRIES,
+        deadline=GEMINI_CALL_DEADLINE,
+        hedge=GEMINI_HEDGE,
+        hedge_model=GEMINI_HEDGE_MODEL,
+        cassette=cassette
+    )
+
+
+def create_model_router():
+    """Router picking models for Auto mode from observed latency and errors"""
+    return ModelRouter(
+        MODEL_ROUTES,
+        MODEL_TOKEN_BUDGETS,
+        alpha=ROUTER_EWMA_ALPHA,
+        max_error_rate=ROUTER_MAX_ERROR_RATE,
+        slow_factor=ROUTER_SLOW_FACTOR,
+        recovery_seconds=ROUTER_RECOVERY_SECONDS
+    )
+
+
+def create_rate_limiter():
+    """Limiter on Gemini requests and tokens per minute"""
+    if RATE_LIMIT_DB:
+        store = SQLiteBucketStore(RATE_LIMIT_DB, GEMINI_RPM, GEMINI_TPM)
+    else:
+        store = MemoryBucketStore(GEMINI_RPM, GEMINI_TPM)
+    return GlobalRateLimiter(store)
+
+
+def create_response_history():
+    """Capped, compressed analysis history for one session"""
+    return ResponseHistory(HISTORY_MAX_ENTRIES, HISTORY_UNCOMPRESSED_ENTRIES)
+
+
+def create_job_queue():
+    """Background job queue shared by all sessions, with an active-jobs gauge"""
+    queue = JobQueue(JOB_WORKERS, JOB_SESSION_WORKERS)
+    METRICS.register_gauge("resumerankr_jobs_active", queue.active_count)
+    return queue
+
+
+def create_session_registry(timeout):
+    """Session registry with a running reaper and a retained-bytes gauge"""
+    registry = SessionRegistry(timeout)
+    registry.start_reaper(SESSION_REAP_INTERVAL)
+    METRICS.register_gauge("resumerankr_session_retained_bytes", registry.retained_bytes)
+    METRICS.register_gauge("resumerankr_sessions", lambda: len(registry))
+    return registry
+
+
+def start_metrics_exporters():
+    """Start the configured metrics endpoint, textfile writer and event log; returns the started handles"""
+    exporters = {}
+    if METRICS_PORT:
+        exporters["server"] = start_metrics_server(METRICS, METRICS_PORT)
+    if METRICS_FILE:
+        exporters["file_writer"] = start_metrics_file_writer(METRICS, METRICS_FILE, METRICS_FILE_INTERVAL)
+    if METRICS_JSON_LOG:
+        exporters["event_log"] = configure_event_log(METRICS_JSON_LOG)
+    return exporters
+
+
+def scan_pdf_bytes(pdf_bytes, cache, pool):
+    """Extract and scan PDF bytes, reusing cached results; safe to call from worker threads"""
+    key = content_digest(pdf_bytes)
+    result = cache.get(key)
+    if result is None:
+        METRICS.inc("resumerankr_extraction_cache_total", result="miss")
+        start = time.perf_counter()
+        try:
+            result = extract_pdf(pdf_bytes, SENSITIVE_DATA_SCANNER, EXTRACTION_LIMITS, pool=pool)
+        except Exception as e:
+            METRICS.inc("resumerankr_errors_total", stage="extract", type=type(e).__name__)
+            raise
+        # Scanning is interleaved with page extraction, so its cost is the time not spent in get_text
+        total = time.perf_counter() - start
+        extract_seconds = sum(result.page_timings)
+        METRICS.observe("resumerankr_stage_seconds", extract_seconds, stage="extract")
+        METRICS.observe("resumerankr_stage_seconds", max(0.0, total - extract_seconds), stage="scan")
+        cache.put(key, result)
+    else:
+        METRICS.inc("resumerankr_extraction_cache_total", result="hit")
+    return result
+
+
+def parse_pdf_sections(pdf_bytes, cache):
+    """Parse resume sections, reusing cached results for identical PDFs"""
+    key = content_digest(pdf_bytes)
+    parsed = cache.get(key)
+    if parsed is None:
+        with METRICS.timer("resumerankr_stage_seconds", stage="parse_sections"):
+            parsed = parse_resume(pdf_bytes)
+        cache.put(key, parsed)
+    return parsed
+
+
+def resume_for_prompt(prompt_key, full_text, pdf_bytes, cache):
+    """Return just the resume sections prompt_key needs, falling back to full_text"""
+    names = PROMPT_SECTIONS.get(prompt_key)
+    if names is None:
+        return full_text
+    parsed = parse_pdf_sections(pdf_bytes, cache)
+    if not parsed.has_sections():
+        return full_text
+    text = parsed.text(names, unrecognized=True)
+    if len(text) < PROMPT_SECTIONS_MIN_SHARE * len(parsed.text()):
+        return full_text
+    return text
+
+
+def parse_match_percentage(response_text):
+    """Extract the match percentage from a Match Percentage response"""
+    match = re.search(r"(\d{1,3})\s*%", response_text)
+    return int(match.group(1)) if match else None
+
+
+def parse_structured_report(response_text):
+    """Parse a structured response into a StructuredReport, raising ValueError if it is malformed"""
+    try:
+        data = json.loads(response_text)
+        return StructuredReport(
+            overview=str(data["overview"]),
+            skill_improvement=str(data["skill_improvement"]),
+            missing_keywords=[str(keyword) for keyword in data["missing_keywords"]],
+            match_percentage=max(0, min(100, int(data["match_percentage"]))),
+            match_explanation=str(data["match_explanation"]),
+            interview_likelihood=str(data["interview_likelihood"]),
+            interview_explanation=str(data["interview_explanation"])
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Malformed structured report: {e}") from e
+
+
+def prepare_inputs(model_name, pdf_content, job_desc, compact):
+    """Compact resume and job description to the model's token budget when enabled"""
+    with METRICS.timer("resumerankr_stage_seconds", stage="prompt_build"):
+        if not compact:
+            tokens = count_tokens(pdf_content) + count_tokens(job_desc)
+            return pdf_content, job_desc, CompactionStats(tokens, tokens)
+        return compact_inputs(pdf_content, job_desc, MODEL_TOKEN_BUDGETS.get(model_name, DEFAULT_TOKEN_BUDGET))
+
+
+def record_cache_lookup(hit):
+    """Count a response cache lookup"""
+    METRICS.inc("resumerankr_response_cache_total", result="hit" if hit else "miss")
+
+
+def record_llm_call(options, mode, duration, compaction_stats, time_to_first_token=None):
+    """Record a completed Gemini call in the metrics and the JSON event log"""
+    METRICS.inc("resumerankr_llm_calls_total", model=options.model_name, mode=mode)
+    METRICS.inc("resumerankr_tokens_total", compaction_stats.tokens_before, model=options.model_name, kind="before_compaction")
+    METRICS.inc("resumerankr_tokens_total", compaction_stats.tokens_after, model=options.model_name, kind="sent")
+    if time_to_first_token is not None:
+        METRICS.observe("resumerankr_stage_seconds", time_to_first_token, stage="llm_first_token", model=options.model_name)
+    log_event(
+        "llm_call",
+        session_id=options.session_id,
+        model=options.model_name,
+        mode=mode,
+        duration=duration,
+        time_to_first_token=time_to_first_token,
+        tokens_before_compaction=compaction_stats.tokens_before,
+        tokens_after_compaction=compaction_stats.tokens_after
+    )
+
+
+def response_stats(model_name, duration, compaction_stats, cached=False, time_to_first_token=None):
+    """Fields saved with a history entry describing the call that produced it"""
+    stats = {
+        "model": model_name,
+        "duration": round(duration, 3),
+        "tokens_before": compaction_stats.tokens_before,
+        "tokens_after": compaction_stats.tokens_after,
+        "cached": cached,
+    }
+    if time_to_first_token is not None:
+        stats["time_to_first_token"] = round(time_to_first_token, 3)
+    return stats
+
+
+def wait_for_capacity(options, contents, on_wait=None):
+    """Wait in the shared queue until the request fits the RPM/TPM quota"""
+    tokens = sum(count_tokens(part) for part in contents) + EXPECTED_OUTPUT_TOKENS
+    with METRICS.timer("resumerankr_stage_seconds", stage="rate_limit_wait"):
+        options.rate_limiter.acquire(options.session_id, tokens, timeout=RATE_LIMIT_MAX_WAIT, on_wait=on_wait)
+
+
+class RequestTally:
+    """Thread-safe count of the Gemini requests sent for one call, so callers can charge them all"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self):
+        with self._lock:
+            self.count += 1
+
+
+def extra_request_charger(options, contents, tally=None):
+    """GeminiClient before_request callback charging retries and hedges to the budget and rate limiter"""
+    def charge(model_name, kind):
+        if not options.budget.take():
+            raise RuntimeError("API usage limit reached")
+        # May run on a client worker thread, so the wait is not reported to the page
+        wait_for_capacity(options, contents)
+        if tally is not None:
+            tally.add()
+        METRICS.inc("resumerankr_llm_extra_requests_total", model=model_name, kind=kind)
+    return charge
+
+
+def call_gemini(options, prompt, pdf_content, job_desc, on_wait=None, tally=None, **kwargs):
+    """Send a single request to Gemini; safe to call from worker threads.
+
+    tally, if given, counts every request sent, retries and hedges included.
+    """
+    contents = [prompt, pdf_content, job_desc]
+    wait_for_capacity(options, contents, on_wait)
+    if tally is not None:
+        tally.add()
+    start = time.time()
+    try:
+        with METRICS.timer("resumerankr_stage_seconds", stage="llm_call", model=options.model_name):
+            response_text = options.client.generate(
+                options.model_name, contents, extra_request_charger(options, contents, tally), **kwargs
+            )
+    except Exception:
+        if options.router is not None:
+            options.router.record_failure(options.model_name)
+        raise
+    duration = time.time() - start
+    if options.router is not None:
+        options.router.record_success(options.model_name, duration)
+    return response_text, duration
+
+
+def stream_gemini(options, prompt, pdf_content, job_desc, on_chunk, on_wait=None, tally=None):
+    """Stream a Gemini response, calling on_chunk with the text received so far.
+
+    Returns (text, time_to_first_token, total_duration). tally is as for call_gemini.
+    """
+    contents = [prompt, pdf_content, job_desc]
+    wait_for_capacity(options, contents, on_wait)
+    if tally is not None:
+        tally.add()
+    try:
+        with METRICS.timer("resumerankr_stage_seconds", stage="llm_call", model=options.model_name):
+            response_text, time_to_first_token, duration = options.client.stream(
+                options.model_name, contents, on_chunk, extra_request_charger(options, contents, tally)
+            )
+    except Exception:
+        if options.router is not None:
+            options.router.record_failure(options.model_name)
+        raise
+    if options.router is not None:
+        options.router.record_success(options.model_name, duration)
+    return response_text, time_to_first_token, duration
+
+
+def routed_models(options, task, pdf_content, job_desc):
+    """Models to try for task in Auto mode, best first; the task's fixed route when options has no router"""
+    if options.router is None:
+        return MODEL_ROUTES.get(task, MODEL_ROUTES["custom"])
+    return options.router.candidates(task, count_tokens(pdf_content) + count_tokens(job_desc))
+
+
+def route_options(options, task, pdf_content, job_desc):
+    """Pin Auto options to the first model routed for task; other options are returned unchanged.
+
+    Streamed responses use these options, so they get no fallback to another model.
+    """
+    if options.model_name != AUTO_MODEL:
+        return options
+    return options._replace(model_name=routed_models(options, task, pdf_content, job_desc)[0])
+
+
+def routed_call(options, prompt, pdf_content, job_desc, parse=None, task=None, on_wait=None, tally=None, **kwargs):
+    """gemini_call on the models routed for task, falling back to the next one when a call fails.
+
+    The returned CallResult's requests include those sent to models that failed.
+    """
+    tally = RequestTally() if tally is None else tally
+    error = None
+    for model_name in routed_models(options, task, pdf_content, job_desc):
+        try:
+            return gemini_call(
+                options._replace(model_name=model_name), prompt, pdf_content, job_desc, parse,
+                on_wait=on_wait, tally=tally, **kwargs
+            )
+        except RateLimitTimeout:
+            # The quota is shared by every model, so another one would wait just as long
+            raise
+        except Exception as e:
+            if options.budget.remaining <= 0:
+                raise
+            error = e
+            METRICS.inc("resumerankr_model_fallbacks_total", model=model_name)
+            log_event("model_fallback", session_id=options.session_id, model=model_name, task=task, error=str(e))
+    raise error
+
+
+def gemini_call(options, prompt, pdf_content, job_desc, parse=None, task=None, on_wait=None, tally=None, **kwargs):
+    """Thread-safe cached Gemini call returning a CallResult.
+
+    With parse, the text is replaced by parse(text) and responses that fail to
+    parse are not cached. task (a prompt key, "report" or None for custom
+    queries) picks the models tried in Auto mode. on_wait is called with the
+    rate-limit queue position while waiting. Other keyword arguments are
+    passed to generate_content.
+    """
+    if options.model_name == AUTO_MODEL:
+        return routed_call(options, prompt, pdf_content, job_desc, parse, task, on_wait, tally, **kwargs)
+    tally = RequestTally() if tally is None else tally
+    pdf_content, job_desc, compaction_stats = prepare_inputs(options.model_name, pdf_content, job_desc, options.compact)
+    cache_key = response_cache_key(options.model_name, prompt, pdf_content, job_desc)
+    start = time.time()
+    response_text = options.response_cache.get(cache_key)
+    record_cache_lookup(response_text is not None)
+    if response_text is not None:
+        result = parse(response_text) if parse else response_text
+        return CallResult(result, time.time() - start, True, options.model_name, compaction_stats, tally.count)
+    if not options.budget.take():
+        raise RuntimeError("API usage limit reached")
+    response_text, duration = call_gemini(options, prompt, pdf_content, job_desc, on_wait, tally, **kwargs)
+    record_llm_call(options, "structured" if kwargs else "generate", duration, compaction_stats)
+    result = parse(response_text) if parse else response_text
+    options.response_cache.put(cache_key, response_text)
+    return CallResult(result, duration, False, options.model_name, compaction_stats, tally.count)
+
+
+def cached_gemini_call(options, prompt, pdf_content, job_desc, parse=None, task=None, **kwargs):
+    """gemini_call returning just (result, duration, cache_hit)"""
+    return tuple(gemini_call(options, prompt, pdf_content, job_desc, parse, task, **kwargs)[:3])
+
+
+def structured_report_call(options, pdf_content, job_desc, on_wait=None):
+    """Run every analysis in one schema-constrained call; the CallResult's result is a StructuredReport"""
+    return gemini_call(
+        options, STRUCTURED_PROMPT, pdf_content, job_desc, parse=parse_structured_report, task="report",
+        on_wait=on_wait, generation_config=STRUCTURED_GENERATION_CONFIG
+    )
+
+
+def analysis_job(options, prompt_key, prompt, resume_text, job_desc, label, on_wait=None):
+    """Run one analysis; returns ([(label, response_text, fields)], requests_sent) for the history"""
+    call = gemini_call(options, prompt, resume_text, job_desc, task=prompt_key, on_wait=on_wait)
+    fields = call.history_fields()
+    if prompt_key == "submit4":
+        fields["match_percentage"] = parse_match_percentage(call.result)
+    return [(label, call.result, fields)], call.requests
+
+
+def report_job(options, resume_text, job_desc, on_wait=None):
+    """Run the structured full report; returns (history entries, requests_sent)"""
+    call = structured_report_call(options, resume_text, job_desc, on_wait)
+    stats = call.history_fields()
+    return [(label, text, {**stats, **fields}) for label, text, fields in call.result.history_entries()], call.requests
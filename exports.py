@@ -0,0 +1,85 @@
+import io
+import json
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+
+def history_to_docx(history):
+    """Convert analysis history to Word document bytes, built entirely in memory"""
+    # Imported lazily so Markdown and JSON exports never load python-docx
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    doc = Document()
+
+    # Add a title
+    title = doc.add_heading('ResumeRankr Analysis Results', 0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    # Add timestamp
+    timestamp_para = doc.add_paragraph()
+    timestamp_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    timestamp_para.add_run(f'Generated on {datetime.now().strftime("%B %d, %Y at %H:%M:%S")}')
+
+    # Add a divider
+    doc.add_paragraph('_' * 50)
+
+    # Process each analysis result
+    for item in history:
+        doc.add_heading(f'{item["type"]} ({item["timestamp"]})', level=1)
+        doc.add_paragraph().add_run(item["response"])
+        doc.add_paragraph('_' * 50)
+
+    # Add footer
+    footer_para = doc.add_paragraph()
+    footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    footer_para.add_run('Generated by ResumeRankr - Powered by Gemini AI')
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def history_to_markdown(history):
+    """Convert analysis history to a Markdown document"""
+    parts = [
+        "# ResumeRankr Analysis Results",
+        f'_Generated on {datetime.now().strftime("%B %d, %Y at %H:%M:%S")}_'
+    ]
+    for item in history:
+        parts.append(f'## {item["type"]} ({item["timestamp"]})\n\n{item["response"]}')
+    parts.append("---\n\nGenerated by ResumeRankr - Powered by Gemini AI")
+    return "\n\n".join(parts) + "\n"
+
+
+def history_to_json(history):
+    """Convert analysis history to a JSON document"""
+    return json.dumps({"generated": datetime.now().isoformat(), "results": list(history)}, indent=2)
+
+
+class ExportFormat(NamedTuple):
+    label: str
+    extension: str
+    mime: str
+    build: Callable
+
+
+EXPORT_FORMATS = {
+    "docx": ExportFormat(
+        "Word", "docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", history_to_docx
+    ),
+    "md": ExportFormat("Markdown", "md", "text/markdown", history_to_markdown),
+    "json": ExportFormat("JSON", "json", "application/json", history_to_json),
+}
+
+
+def cached_export(exports, version, history, fmt):
+    """Return history exported as fmt, rebuilding only when the history version changed.
+
+    exports maps format name to (version, data) and is updated in place.
+    """
+    cached = exports.get(fmt)
+    if cached is None or cached[0] != version:
+        cached = (version, EXPORT_FORMATS[fmt].build(history))
+        exports[fmt] = cached
+    return cached[1]
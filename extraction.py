@@ -0,0 +1,113 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import NamedTuple, Optional
+
+import fitz  # PyMuPDF
+
+# Pages handed to a pool worker per task when extracting in parallel
+PAGES_PER_TASK = 4
+
+
+class ExtractionLimits(NamedTuple):
+    max_pages: int = 50
+    max_bytes: int = 10 * 1024 * 1024
+    time_budget: float = 10.0
+    # Documents with at least this many pages are split across the process pool
+    parallel_min_pages: int = 8
+
+
+class ExtractionResult(NamedTuple):
+    text: str
+    sensitive_rule: Optional[str]
+    page_timings: list
+
+
+class ExtractionError(Exception):
+    """Raised when a PDF exceeds the configured extraction limits"""
+
+
+def create_process_pool(workers):
+    """Create a process pool for page extraction, or None when workers is 0"""
+    if workers <= 0:
+        return None
+    # Spawned workers only import this module, never the Streamlit app
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _extract_page_range(pdf_bytes, start, stop):
+    """Extract text for pages [start, stop); runs inside pool workers"""
+    texts = []
+    timings = []
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for number in range(start, stop):
+            page_start = time.perf_counter()
+            texts.append(doc[number].get_text())
+            timings.append(time.perf_counter() - page_start)
+    return texts, timings
+
+
+def _check_budget(started, limits):
+    if time.perf_counter() - started > limits.time_budget:
+        raise ExtractionError(f"PDF extraction exceeded the {limits.time_budget:g} second time budget")
+
+
+def _iter_pages(doc, started, limits, timings):
+    for page in doc:
+        page_start = time.perf_counter()
+        text = page.get_text()
+        timings.append(time.perf_counter() - page_start)
+        _check_budget(started, limits)
+        yield text
+
+
+def _extract_parallel(pdf_bytes, page_count, started, limits, pool):
+    futures = [
+        pool.submit(_extract_page_range, pdf_bytes, start, min(start + PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PAGES_PER_TASK)
+    ]
+    remaining = limits.time_budget - (time.perf_counter() - started)
+    _, not_done = wait(futures, timeout=max(0, remaining))
+    if not_done:
+        # Only drops ranges still waiting for a worker; running ones finish and are discarded
+        for future in not_done:
+            future.cancel()
+        raise ExtractionError(f"PDF extraction exceeded the {limits.time_budget:g} second time budget")
+
+    texts = []
+    timings = []
+    for future in futures:
+        chunk_texts, chunk_timings = future.result()
+        texts.extend(chunk_texts)
+        timings.extend(chunk_timings)
+    return texts, timings
+
+
+def extract_pdf(pdf_bytes, scanner, limits=ExtractionLimits(), pool=None):
+    """Extract and scan PDF text within the given page, byte and time limits.
+
+    Small documents are extracted page by page on the calling thread and the
+    scan stops at the first sensitive-data hit. Large documents are split into
+    page ranges extracted in parallel by the process pool, then reassembled in
+    page order and scanned.
+
+    The time budget is checked after each page, so a single slow page can
+    overrun it. Page ranges already running in the pool cannot be stopped
+    and finish in the background after the budget runs out.
+    """
+    if len(pdf_bytes) > limits.max_bytes:
+        raise ExtractionError(f"PDF is larger than the {limits.max_bytes / (1024 * 1024):g} MB limit")
+
+    started = time.perf_counter()
+    timings = []
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_count = doc.page_count
+        if page_count > limits.max_pages:
+            raise ExtractionError(f"PDF has {page_count} pages; the limit is {limits.max_pages}")
+        if pool is None or page_count < limits.parallel_min_pages:
+            text, sensitive_rule = scanner.scan_pages(_iter_pages(doc, started, limits, timings))
+            return ExtractionResult(text or "", sensitive_rule, timings)
+
+    texts, timings = _extract_parallel(pdf_bytes, page_count, started, limits, pool)
+    text, sensitive_rule = scanner.scan_pages(texts)
+    return ExtractionResult(text or "", sensitive_rule, timings)
@@ -0,0 +1,167 @@
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+
+
+class ResponseHistory:
+    """Per-session analysis history with a cap on entries and compressed older responses.
+
+    At most max_entries are kept; the oldest are evicted first. Only the
+    newest keep_uncompressed responses are held as plain text, older ones are
+    zlib-compressed and decompressed on read. Iterating yields entry dicts in
+    insertion order. version changes on every append, so derived data such as
+    exports (kept in .exports) can be memoized against it.
+    """
+
+    def __init__(self, max_entries=50, keep_uncompressed=5):
+        self.max_entries = max_entries
+        self.keep_uncompressed = keep_uncompressed
+        self.version = 0
+        self.exports = {}
+        self._entries = deque()
+        self._lock = threading.Lock()
+
+    def append(self, entry):
+        with self._lock:
+            self._entries.append(dict(entry))
+            while len(self._entries) > self.max_entries:
+                self._entries.popleft()
+            compress_index = len(self._entries) - self.keep_uncompressed - 1
+            if compress_index >= 0:
+                old = self._entries[compress_index]
+                if "response" in old:
+                    old["response_z"] = zlib.compress(old.pop("response").encode("utf-8"))
+            self.version += 1
+            self.exports.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.exports.clear()
+            self.version += 1
+
+    def _expand(self, entry):
+        if "response_z" not in entry:
+            return dict(entry)
+        expanded = {key: value for key, value in entry.items() if key != "response_z"}
+        expanded["response"] = zlib.decompress(entry["response_z"]).decode("utf-8")
+        return expanded
+
+    def __iter__(self):
+        with self._lock:
+            entries = list(self._entries)
+        return (self._expand(entry) for entry in entries)
+
+    def __reversed__(self):
+        with self._lock:
+            entries = list(self._entries)
+        return (self._expand(entry) for entry in reversed(entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def latest(self, query_type):
+        """Return the newest entry of the given type, or None"""
+        with self._lock:
+            entry = next((entry for entry in reversed(self._entries) if entry["type"] == query_type), None)
+        return None if entry is None else self._expand(entry)
+
+    def retained_bytes(self):
+        """Approximate bytes held by responses and memoized exports"""
+        with self._lock:
+            responses = sum(
+                sys.getsizeof(entry.get("response_z", entry.get("response", ""))) for entry in self._entries
+            )
+            exports = sum(sys.getsizeof(data) for _, data in self.exports.values())
+        return responses + exports
+
+
+def approximate_size(value):
+    """Rough bytes held by value, following lists, tuples and dicts"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(key) + approximate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+
+class SessionRegistry:
+    """Process-wide record of session data so expired sessions can be cleared without a rerun.
+
+    Streamlit only runs a session's script when its user interacts, so a
+    session abandoned mid-way would otherwise keep its data until the
+    server restarts. The reaper thread clears the history and results dict
+    of every session that started more than timeout seconds ago, and drops
+    it from each server-side store added with add_store (anything with
+    discard(session_id) and retained_bytes(session_id), such as a JobQueue).
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._sessions = {}
+        self._stores = []
+        self._lock = threading.Lock()
+
+    def add_store(self, store):
+        """Also drop expired sessions from store and count their bytes in retained_bytes"""
+        with self._lock:
+            self._stores.append(store)
+
+    def attach(self, session_id, started_at, history, results=None):
+        """Track history and a results dict for session_id, whose session started at the given epoch time"""
+        with self._lock:
+            self._sessions[session_id] = (started_at, history, {} if results is None else results)
+
+    def _clear(self, session_id, history, results):
+        history.clear()
+        results.clear()
+        for store in self._stores:
+            store.discard(session_id)
+
+    def detach(self, session_id):
+        """Stop tracking a session and clear its data"""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            self._clear(session_id, *entry[1:])
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def reap(self, now=None):
+        """Clear and forget every expired session; returns how many were reaped"""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [
+                session_id for session_id, (started_at, _, _) in self._sessions.items()
+                if now - started_at > self.timeout
+            ]
+            entries = [(session_id, self._sessions.pop(session_id)) for session_id in expired]
+        for session_id, (_, history, results) in entries:
+            self._clear(session_id, history, results)
+        return len(entries)
+
+    def retained_bytes(self):
+        """Approximate bytes retained by every tracked session's history, results and store entries"""
+        with self._lock:
+            sessions = list(self._sessions.items())
+            stores = list(self._stores)
+        return sum(
+            history.retained_bytes() + approximate_size(results)
+            + sum(store.retained_bytes(session_id) for store in stores)
+            for session_id, (_, history, results) in sessions
+        )
+
+    def start_reaper(self, interval=60.0):
+        """Reap expired sessions every interval seconds from a daemon thread"""
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.reap()
+
+        threading.Thread(target=run, name="session-reaper", daemon=True).start()
+        return stop
@@ -0,0 +1,103 @@
+import gzip
+import heapq
+import json
+import math
+import os
+import threading
+import uuid
+from collections import Counter
+
+from scoring import tokenize
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class JobIndex:
+    """Persistent BM25 inverted index of job descriptions for resume-to-posting retrieval.
+
+    The index is stored as gzip-compressed JSON holding both the postings and
+    the term index, so loading does not re-tokenize any posting.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.postings = {}
+        self.terms = {}
+        self.lengths = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        self.postings = data["postings"]
+        self.lengths = data["lengths"]
+        self.terms = {term: dict(entries) for term, entries in data["terms"].items()}
+
+    def save(self):
+        """Write the index atomically to its path"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                "postings": self.postings,
+                "lengths": self.lengths,
+                "terms": {term: list(entries.items()) for term, entries in self.terms.items()},
+            }
+            tmp_path = f"{self.path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+
+    def add(self, title, text, save=True):
+        """Index a job description and return its id; pass save=False when adding in bulk"""
+        posting_id = uuid.uuid4().hex[:12]
+        counts = Counter(tokenize(text))
+        with self._lock:
+            self.postings[posting_id] = {"title": title, "text": text}
+            self.lengths[posting_id] = sum(counts.values())
+            for term, tf in counts.items():
+                self.terms.setdefault(term, {})[posting_id] = tf
+        if save:
+            self.save()
+        return posting_id
+
+    def remove(self, posting_id):
+        """Remove a job description from the index"""
+        with self._lock:
+            posting = self.postings.pop(posting_id, None)
+            if posting is None:
+                return
+            del self.lengths[posting_id]
+            for term in set(tokenize(posting["text"])):
+                entries = self.terms.get(term)
+                if entries is not None:
+                    entries.pop(posting_id, None)
+                    if not entries:
+                        del self.terms[term]
+        self.save()
+
+    def search(self, resume_text, k=5):
+        """Return the top-k (posting_id, title, score) tuples for a resume"""
+        with self._lock:
+            n = len(self.postings)
+            if n == 0:
+                return []
+            average_length = sum(self.lengths.values()) / n or 1
+            scores = Counter()
+            for term in set(tokenize(resume_text)):
+                entries = self.terms.get(term)
+                if not entries:
+                    continue
+                idf = math.log1p((n - len(entries) + 0.5) / (len(entries) + 0.5))
+                for posting_id, tf in entries.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[posting_id] / average_length)
+                    scores[posting_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(posting_id, self.postings[posting_id]["title"], score) for posting_id, score in top]
+
+    def __len__(self):
+        return len(self.postings)
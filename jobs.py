@@ -0,0 +1,231 @@
+import itertools
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from history import approximate_size
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# A reported rate-limit wait older than this means the job got through the queue
+WAIT_REPORT_SECONDS = 1.0
+
+
+class Job:
+    """A unit of background work owned by one session"""
+
+    def __init__(self, job_id, session_id, label, speculative=False, timeout=None):
+        self.id = job_id
+        self.session_id = session_id
+        self.label = label
+        # Speculative jobs run ahead of a request that may never come
+        self.speculative = speculative
+        # Seconds the job may run before it is failed with a TimeoutError
+        self.timeout = timeout
+        self.status = QUEUED
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.collected = False
+        self.future = None
+        # Whether the job holds one of its session's worker slots
+        self.capped = False
+        self._wait = None
+
+    def report_wait(self, position, seconds):
+        """on_wait callback recording the job's place in the API rate-limit queue"""
+        self._wait = (position, seconds, time.monotonic())
+
+    @property
+    def waiting(self):
+        """(queue_position, estimated_wait_seconds) while the job waits for API capacity, else None"""
+        wait = self._wait
+        if self.status != RUNNING or wait is None or time.monotonic() - wait[2] > WAIT_REPORT_SECONDS:
+            return None
+        return wait[:2]
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def queue_seconds(self):
+        """Seconds spent waiting for a worker (so far, if still queued)"""
+        return (self.started_at or self.finished_at or time.time()) - self.submitted_at
+
+    @property
+    def run_seconds(self):
+        """Seconds spent running (so far, if still running), or None if it never started"""
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobQueue:
+    """Process-wide worker pool running session jobs in the background.
+
+    Jobs are identified by ID and kept per session, so they outlive the
+    Streamlit rerun that submitted them. Finished jobs are handed back once
+    through collect(). Cancelling a queued job stops it from starting;
+    cancelling a running job discards its result when it finishes, as does
+    a running job timing out. Speculative jobs become regular jobs when adopted.
+
+    A session has at most max_per_session jobs on workers at once; the rest
+    wait in its own queue, so one session cannot hold every worker.
+    Speculative jobs go straight to the pool and take none of those slots.
+    """
+
+    def __init__(self, max_workers=8, max_per_session=5, retain_seconds=3600):
+        self.max_per_session = max_per_session
+        self.retain_seconds = retain_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._pending = {}
+        self._dispatched = Counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, session_id, label, fn, *args, speculative=False, timeout=None, track_wait=False, **kwargs):
+        """Queue fn(*args, **kwargs) for session_id and return the new job's ID.
+
+        With track_wait, fn also gets on_wait=job.report_wait so the job's
+        place in the API queue shows in Job.waiting.
+        """
+        with self._lock:
+            self._prune()
+            job = Job(f"{session_id}-{next(self._ids)}", session_id, label, speculative, timeout)
+            if track_wait:
+                kwargs["on_wait"] = job.report_wait
+            self._jobs[job.id] = job
+            if speculative:
+                job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+            else:
+                self._pending.setdefault(session_id, deque()).append((job, fn, args, kwargs))
+                self._dispatch(session_id)
+        return job.id
+
+    def _dispatch(self, session_id):
+        # Called with the lock held; hands the session's queued jobs to workers up to its cap
+        pending = self._pending.get(session_id)
+        while pending and self._dispatched[session_id] < self.max_per_session:
+            job, fn, args, kwargs = pending.popleft()
+            if job.status != QUEUED:
+                continue
+            self._dispatched[session_id] += 1
+            job.capped = True
+            job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        if not pending:
+            self._pending.pop(session_id, None)
+        if not self._dispatched[session_id]:
+            del self._dispatched[session_id]
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            with self._lock:
+                if job.status != QUEUED:
+                    return
+                job.status = RUNNING
+                job.started_at = time.time()
+            try:
+                result, error, status = fn(*args, **kwargs), None, DONE
+            except Exception as e:
+                result, error, status = None, e, FAILED
+            with self._lock:
+                if job.status == RUNNING:
+                    job.status, job.result, job.error = status, result, error
+                    job.finished_at = time.time()
+        finally:
+            if job.capped:
+                with self._lock:
+                    self._dispatched[job.session_id] -= 1
+                    self._dispatch(job.session_id)
+
+    def _expire(self):
+        # Called with the lock held; fails running jobs that are past their timeout
+        now = time.time()
+        for job in self._jobs.values():
+            if job.status == RUNNING and job.timeout is not None and now - job.started_at > job.timeout:
+                job.status, job.error = FAILED, TimeoutError(f"No response within {job.timeout:g} seconds")
+                job.finished_at = now
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, session_id):
+        """Return a session's jobs in submission order"""
+        with self._lock:
+            self._expire()
+            return [job for job in self._jobs.values() if job.session_id == session_id]
+
+    def active_count(self, session_id=None):
+        """Count queued and running jobs, for one session or all of them"""
+        with self._lock:
+            self._expire()
+            return sum(
+                1 for job in self._jobs.values()
+                if not job.finished and (session_id is None or job.session_id == session_id)
+            )
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns False if it had already finished"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            # A queued job left on its worker's queue returns as soon as it starts
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            return True
+
+    def adopt(self, job_id):
+        """Turn a speculative job into a regular one; returns the job, or None if it failed or was cancelled"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in (FAILED, CANCELLED):
+                return None
+            job.speculative = False
+            return job
+
+    def collect(self, session_id):
+        """Return a session's jobs that finished since the last call"""
+        with self._lock:
+            self._expire()
+            finished = [
+                job for job in self._jobs.values()
+                if job.session_id == session_id and job.finished and not job.collected
+            ]
+            for job in finished:
+                job.collected = True
+            return finished
+
+    def discard(self, session_id):
+        """Cancel and forget every job of a session"""
+        with self._lock:
+            job_ids = [job.id for job in self._jobs.values() if job.session_id == session_id]
+        for job_id in job_ids:
+            self.cancel(job_id)
+        with self._lock:
+            self._pending.pop(session_id, None)
+            for job_id in job_ids:
+                self._jobs.pop(job_id, None)
+
+    def retained_bytes(self, session_id):
+        """Approximate bytes held by a session's job results"""
+        with self._lock:
+            results = [job.result for job in self._jobs.values() if job.session_id == session_id]
+        return sum(approximate_size(result) for result in results if result is not None)
+
+    def _prune(self):
+        # Called with the lock held; drops jobs that finished more than retain_seconds ago
+        cutoff = time.time() - self.retain_seconds
+        for job_id in [job.id for job in self._jobs.values() if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+event_logger = logging.getLogger("resumerankr.events")
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and latency histograms with Prometheus text export.
+
+    Metric names are used as given, so pass the full name (for example
+    "resumerankr_llm_calls_total"). Labels are keyword arguments.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = defaultdict(lambda: defaultdict(float))
+        self._histograms = defaultdict(dict)
+        self._gauges = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, amount=1, **labels):
+        """Add amount to a counter"""
+        with self._lock:
+            self._counters[name][_label_key(labels)] += amount
+
+    def register_gauge(self, name, read):
+        """Register a gauge whose value is read by calling read() at export time"""
+        with self._lock:
+            self._gauges[name] = read
+
+    def observe(self, name, seconds, **labels):
+        """Record a latency observation in a histogram"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms[name].get(key)
+            if series is None:
+                series = self._histograms[name][key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time a block into a histogram; failures are also counted by exception type"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc("resumerankr_errors_total", stage=labels.get("stage", name), type=type(e).__name__)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """Return a JSON-serializable copy of all metrics"""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {"labels": dict(key), "buckets": list(counts), "sum": total, "count": count}
+                    for key, (counts, total, count) in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+            gauges = dict(self._gauges)
+        return {
+            "counters": counters,
+            "gauges": {name: read() for name, read in gauges.items()},
+            "histograms": histograms,
+            "buckets": list(self.buckets)
+        }
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            gauges = dict(self._gauges)
+        # Gauges are read outside the lock; their callbacks may take other locks
+        for name, read in sorted(gauges.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {read():g}")
+        with self._lock:
+            for name in sorted(self._counters):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name in sorted(self._histograms):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, (counts, total, count) in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(self.buckets, counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', f'{bound:g}')])} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {total:g}")
+                    lines.append(f"{name}_count{_format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomically write the Prometheus text export to path (for node_exporter's textfile collector)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def log_event(event, **fields):
+    """Emit a structured JSON log line on the resumerankr.events logger"""
+    if event_logger.isEnabledFor(logging.INFO):
+        event_logger.info(json.dumps({"event": event, "time": time.time(), **fields}, default=str))
+
+
+def configure_event_log(destination):
+    """Send JSON event logs to a file path, or to stderr when destination is "-" """
+    handler = logging.StreamHandler() if destination == "-" else logging.FileHandler(destination)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    event_logger.addHandler(handler)
+    event_logger.setLevel(logging.INFO)
+    event_logger.propagate = False
+    return handler
+
+
+def start_metrics_server(registry, port, host="0.0.0.0"):
+    """Serve registry at http://host:port/metrics from a daemon thread"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def start_metrics_file_writer(registry, path, interval=15.0):
+    """Rewrite the Prometheus text file every interval seconds from a daemon thread"""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            registry.write_prometheus(path)
+
+    threading.Thread(target=run, name="metrics-file-writer", daemon=True).start()
+    return stop
+
+
+# Process-wide registry shared by the app, the CLI and the core analysis code
+METRICS = MetricsRegistry()
+METRICS.describe("resumerankr_stage_seconds", "Latency of each analysis pipeline stage")
+METRICS.describe("resumerankr_llm_calls_total", "Gemini calls by model and mode")
+METRICS.describe("resumerankr_llm_extra_requests_total", "Gemini retries and hedged requests by model and kind")
+METRICS.describe("resumerankr_tokens_total", "Estimated input tokens sent to Gemini, before and after compaction")
+METRICS.describe("resumerankr_response_cache_total", "Response cache lookups by result")
+METRICS.describe("resumerankr_extraction_cache_total", "Extracted resume text cache lookups by result")
+METRICS.describe("resumerankr_errors_total", "Failures by pipeline stage and exception type")
+METRICS.describe("resumerankr_session_retained_bytes", "Approximate bytes of history, results and job output held by live sessions")
+METRICS.describe("resumerankr_sessions", "Sessions with a tracked analysis history")
+METRICS.describe("resumerankr_jobs_active", "Queued and running background analysis jobs")
+METRICS.describe("resumerankr_prefetch_total", "Speculative prefetch jobs by outcome")
+METRICS.describe("resumerankr_model_fallbacks_total", "Auto-routed calls that failed and moved on to the next model")
+METRICS.describe("resumerankr_render_seconds", "Server time per run of the page script or one of its fragments")
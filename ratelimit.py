@@ -0,0 +1,148 @@
+import itertools
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import closing
+
+
+class RateLimitTimeout(TimeoutError):
+    """Raised when a request waits in the queue longer than allowed"""
+
+
+class MemoryBucketStore:
+    """Request and token buckets held in this process"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.limits = (requests_per_minute, tokens_per_minute)
+        self.levels = list(self.limits)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_consume(self, requests, tokens):
+        """Consume from both buckets, or return the seconds until enough capacity refills"""
+        with self._lock:
+            now = time.monotonic()
+            self.levels = _refill(self.levels, self.limits, now - self.updated)
+            self.updated = now
+            wait = _deficit_wait(self.levels, self.limits, (requests, tokens))
+            if wait == 0:
+                self.levels = [self.levels[0] - requests, self.levels[1] - tokens]
+            return wait
+
+
+class SQLiteBucketStore:
+    """Request and token buckets in a SQLite file, shared by every worker process on a host"""
+
+    def __init__(self, path, requests_per_minute, tokens_per_minute):
+        self.path = path
+        self.limits = (requests_per_minute, tokens_per_minute)
+        with closing(sqlite3.connect(self.path, timeout=10)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(id INTEGER PRIMARY KEY CHECK (id = 0), requests REAL, tokens REAL, updated REAL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO buckets VALUES (0, ?, ?, ?)",
+                (requests_per_minute, tokens_per_minute, time.time())
+            )
+
+    def try_consume(self, requests, tokens):
+        """Consume from both buckets, or return the seconds until enough capacity refills"""
+        with closing(sqlite3.connect(self.path, timeout=10, isolation_level=None)) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                level_requests, level_tokens, updated = conn.execute(
+                    "SELECT requests, tokens, updated FROM buckets WHERE id = 0"
+                ).fetchone()
+                now = time.time()
+                levels = _refill([level_requests, level_tokens], self.limits, now - updated)
+                wait = _deficit_wait(levels, self.limits, (requests, tokens))
+                if wait == 0:
+                    levels = [levels[0] - requests, levels[1] - tokens]
+                conn.execute(
+                    "UPDATE buckets SET requests = ?, tokens = ?, updated = ? WHERE id = 0",
+                    (levels[0], levels[1], now)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return wait
+
+
+def _refill(levels, limits, elapsed):
+    return [min(limit, level + elapsed * limit / 60) for level, limit in zip(levels, limits)]
+
+
+def _deficit_wait(levels, limits, costs):
+    # A single request larger than a whole bucket is let through once the bucket is full
+    costs = [min(cost, limit) for cost, limit in zip(costs, limits)]
+    return max(max(0.0, cost - level) * 60 / limit for cost, level, limit in zip(costs, levels, limits))
+
+
+class GlobalRateLimiter:
+    """Process-wide token-bucket limiter on requests and tokens per minute with a fair queue.
+
+    Waiting requests are served round-robin across sessions and FIFO within a
+    session, so one session's batch cannot starve everyone else.
+    """
+
+    def __init__(self, store, poll_interval=0.25):
+        self.store = store
+        self.poll_interval = poll_interval
+        self._queues = OrderedDict()
+        self._cond = threading.Condition()
+        self._tickets = itertools.count()
+
+    def _schedule(self):
+        """Return waiting tickets in the order they will be served"""
+        queues = [list(queue) for queue in self._queues.values()]
+        return [ticket for round_ in itertools.zip_longest(*queues) for ticket in round_ if ticket is not None]
+
+    def queue_length(self):
+        with self._cond:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def _estimate_wait(self, position, tokens):
+        requests_per_second = self.store.limits[0] / 60
+        tokens_per_second = self.store.limits[1] / 60
+        return max(position / requests_per_second, position * tokens / tokens_per_second)
+
+    def acquire(self, session_id, tokens, timeout=None, on_wait=None):
+        """Block until the request may be sent.
+
+        on_wait, if given, is called with (queue_position, estimated_wait_seconds)
+        while the request is waiting. Raises RateLimitTimeout after timeout seconds.
+        """
+        ticket = next(self._tickets)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._queues.setdefault(session_id, deque()).append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    schedule = self._schedule()
+                    position = schedule.index(ticket)
+                    wait = self.store.try_consume(1, tokens) if position == 0 else None
+                    if wait == 0:
+                        self._queues[session_id].popleft()
+                        # Move this session to the back of the round-robin order
+                        self._queues.move_to_end(session_id)
+                        self._cond.notify_all()
+                        return
+                if on_wait is not None:
+                    on_wait(position + 1, wait if position == 0 else self._estimate_wait(position + 1, tokens))
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise RateLimitTimeout("Timed out waiting for API capacity. Please try again later.")
+                with self._cond:
+                    self._cond.wait(min(self.poll_interval, wait or self.poll_interval))
+        finally:
+            with self._cond:
+                queue = self._queues.get(session_id)
+                if queue is not None:
+                    if ticket in queue:
+                        queue.remove(ticket)
+                    if not queue:
+                        del self._queues[session_id]
+                self._cond.notify_all()
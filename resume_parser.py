@@ -0,0 +1,104 @@
+from collections import Counter
+from typing import NamedTuple
+
+import fitz  # PyMuPDF
+
+from compaction import SECTION_HEADING_RE, SECTION_KEYWORD_RE
+
+# PyMuPDF span flag for bold text
+BOLD_FLAG = 16
+# Lines at least this many points larger than the body font are treated as headings
+HEADING_SIZE_DELTA = 1.0
+# Longest line, in words, that can be a heading
+MAX_HEADING_WORDS = 5
+
+
+class ResumeSection(NamedTuple):
+    name: str
+    heading: str
+    text: str
+
+
+class ParsedResume(NamedTuple):
+    """Resume text split into named sections, in document order"""
+    sections: list
+
+    def has_sections(self):
+        """Whether any known section heading was found"""
+        return any(section.name != "other" for section in self.sections)
+
+    def text(self, names=None, unrecognized=False):
+        """Return the text of the named sections (all when names is None), keeping document order.
+
+        With unrecognized, sections under headings that match no known name are included too.
+        """
+        return "\n\n".join(
+            "\n".join(part for part in (section.heading, section.text) if part)
+            for section in self.sections
+            if names is None or section.name in names or (unrecognized and section.name == "other" and section.heading)
+        )
+
+    def section(self, name):
+        """Return the combined text of every section with the given name"""
+        return "\n".join(section.text for section in self.sections if section.name == name)
+
+
+def _lines(doc):
+    """Yield (text, max_font_size, all_bold) for every text line in reading order"""
+    for page in doc:
+        for block in page.get_text("dict")["blocks"]:
+            for line in block.get("lines", []):
+                spans = [span for span in line["spans"] if span["text"].strip()]
+                if not spans:
+                    continue
+                text = " ".join(" ".join(span["text"] for span in spans).split())
+                yield text, max(span["size"] for span in spans), all(span["flags"] & BOLD_FLAG for span in spans)
+
+
+def _body_size(lines):
+    sizes = Counter()
+    for text, size, _ in lines:
+        sizes[round(size, 1)] += len(text)
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def _heading_name(text, size, bold, body_size):
+    """Return the section name a line starts, or None for body text"""
+    if len(text.split()) > MAX_HEADING_WORDS:
+        return None
+    name = next((name for name, pattern in SECTION_HEADING_RE.items() if pattern.match(text)), None)
+    if name is not None:
+        return name
+    # Styled like a heading, or labelled with a colon: a known name anywhere in it counts
+    if size >= body_size + HEADING_SIZE_DELTA or bold or text.endswith(":"):
+        name = next((name for name, pattern in SECTION_KEYWORD_RE.items() if pattern.search(text)), None)
+        if name is not None:
+            return name
+    if size >= body_size + HEADING_SIZE_DELTA or (bold and text.isupper()):
+        return "other"
+    return None
+
+
+def parse_resume(pdf_bytes):
+    """Split a resume PDF into sections using heading names plus font size and weight.
+
+    Text before the first heading (name, contact details) and sections with
+    unrecognized headings are named "other".
+    """
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        lines = list(_lines(doc))
+
+    body_size = _body_size(lines)
+    sections = []
+    name, heading, body = "other", "", []
+    for text, size, bold in lines:
+        section_name = _heading_name(text, size, bold, body_size)
+        if section_name is None:
+            body.append(text)
+            continue
+        if heading or body:
+            sections.append(ResumeSection(name, heading, "\n".join(body)))
+        name, heading, body = section_name, text, []
+    if heading or body:
+        sections.append(ResumeSection(name, heading, "\n".join(body)))
+    return ParsedResume(sections)
@@ -0,0 +1,80 @@
+import threading
+import time
+
+
+class ModelRouter:
+    """Pick Gemini models per request from the task, input size and recent model health.
+
+    Each task has candidate models in order of preference; unknown tasks use
+    default_route. Candidates are reordered so that degraded models (EWMA
+    error rate at or above max_error_rate, with a failure in the last
+    recovery_seconds) come last, then models whose EWMA latency is more than
+    slow_factor times the fastest healthy candidate's, then models whose
+    token budget cannot hold the input without trimming. Models never tried
+    count as healthy, so they get measured.
+    """
+
+    def __init__(self, routes, token_budgets, default_route="custom", alpha=0.2, max_error_rate=0.3,
+                 slow_factor=2.0, recovery_seconds=60.0):
+        self.routes = routes
+        self.token_budgets = token_budgets
+        self.default_route = default_route
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.slow_factor = slow_factor
+        self.recovery_seconds = recovery_seconds
+        self._latency = {}
+        self._error_rate = {}
+        self._last_failure = {}
+        self._lock = threading.Lock()
+
+    def _ewma(self, previous, value):
+        return value if previous is None else self.alpha * value + (1 - self.alpha) * previous
+
+    def record_success(self, model_name, seconds):
+        with self._lock:
+            self._latency[model_name] = self._ewma(self._latency.get(model_name), seconds)
+            self._error_rate[model_name] = self._ewma(self._error_rate.get(model_name, 0.0), 0.0)
+
+    def record_failure(self, model_name):
+        with self._lock:
+            self._error_rate[model_name] = self._ewma(self._error_rate.get(model_name, 0.0), 1.0)
+            self._last_failure[model_name] = time.monotonic()
+
+    def stats(self):
+        """Return {model: (ewma_latency or None, ewma_error_rate)} for every model seen"""
+        with self._lock:
+            return {
+                model_name: (self._latency.get(model_name), self._error_rate.get(model_name, 0.0))
+                for model_name in self._latency.keys() | self._error_rate.keys()
+            }
+
+    def degraded(self, model_name, now=None):
+        """Whether a model failed often enough, and recently enough, to be tried last"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return (
+                self._error_rate.get(model_name, 0.0) >= self.max_error_rate
+                and now - self._last_failure.get(model_name, float("-inf")) < self.recovery_seconds
+            )
+
+    def candidates(self, task, tokens):
+        """Return the models to try for task with an input of the given token count, best first"""
+        route = self.routes.get(task, self.routes[self.default_route])
+        now = time.monotonic()
+        degraded = {model_name for model_name in route if self.degraded(model_name, now)}
+        with self._lock:
+            latencies = {model_name: self._latency.get(model_name) for model_name in route}
+        healthy_latencies = [
+            latency for model_name, latency in latencies.items() if model_name not in degraded and latency is not None
+        ]
+        fastest = min(healthy_latencies, default=None)
+
+        def rank(model_name):
+            latency = latencies[model_name]
+            slow = fastest is not None and latency is not None and latency > self.slow_factor * fastest
+            too_small = self.token_budgets.get(model_name, tokens) < tokens
+            return model_name in degraded, slow, too_small
+
+        # sorted() is stable, so ties keep the task's order of preference
+        return sorted(route, key=rank)
@@ -0,0 +1,71 @@
+import re
+from typing import Callable, NamedTuple, Optional
+
+from compaction import PAGE_BREAK
+
+# Characters carried over from the previous page so matches spanning a page break are still found
+PAGE_OVERLAP_CHARS = 64
+
+
+def luhn_valid(number):
+    """Return True if the digits in number pass the Luhn checksum"""
+    digits = [int(d) for d in number if d.isdigit()]
+    checksum = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2 == 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        checksum += digit
+    return bool(digits) and checksum % 10 == 0
+
+
+class ScanRule(NamedTuple):
+    name: str
+    pattern: str
+    validator: Optional[Callable[[str], bool]] = None
+
+
+DEFAULT_RULES = [
+    ScanRule("ssn", r'\b\d{3}-\d{2}-\d{4}\b'),
+    ScanRule("credit_card", r'\b\d{16}\b', luhn_valid),
+    ScanRule("password", r'\b(?:password|passwd)(?:\s*:)?\s*\w+\b'),
+]
+
+
+class SensitiveDataScanner:
+    """Single-pass scanner combining all rules into one precompiled, case-insensitive regex"""
+
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = {rule.name: rule for rule in rules}
+        patterns = [rule.pattern for rule in rules]
+        # Hoisting a shared leading word boundary lets the regex engine skip most positions once
+        prefix = r"\b" if all(pattern.startswith(r"\b") for pattern in patterns) else ""
+        if prefix:
+            patterns = [pattern[len(prefix):] for pattern in patterns]
+        alternatives = "|".join(f"(?P<{rule.name}>{pattern})" for rule, pattern in zip(rules, patterns))
+        self.pattern = re.compile(f"{prefix}(?:{alternatives})", re.IGNORECASE)
+
+    def find(self, text):
+        """Return the name of the first rule that matches text, or None"""
+        for match in self.pattern.finditer(text):
+            rule = self.rules[match.lastgroup]
+            if rule.validator is None or rule.validator(match.group()):
+                return rule.name
+        return None
+
+    def scan_pages(self, pages):
+        """Scan page texts as they are produced, stopping at the first hit.
+
+        Returns (text, rule_name): the text with pages joined by PAGE_BREAK and
+        None when the pages are clean, or (None, rule_name) as soon as a rule matches.
+        """
+        parts = []
+        tail = ""
+        for page_text in pages:
+            hit = self.find(tail + " " + page_text if tail else page_text)
+            if hit is not None:
+                return None, hit
+            parts.append(page_text)
+            tail = page_text[-PAGE_OVERLAP_CHARS:]
+        return PAGE_BREAK.join(parts), None
@@ -0,0 +1,96 @@
+import re
+from collections import Counter
+from typing import NamedTuple
+
+import numpy as np
+
+from compaction import BOILERPLATE_RE
+
+# Keeps tech terms such as "c++", "c#", "node.js" and "ci/cd" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset("""
+a about above across after again against all also am an and any are as at be been before being below
+between both but by can could did do does doing down during each either etc few for from further had
+has have having he her here hers him his how i if in into is it its itself just may me might more most
+must my no nor not of off on once only or other our ours out over own per same she should so some such
+than that the their theirs them then there these they this those through to too under until up upon us
+very via was we were what when where which while who whom why will with within without would you your
+ability able candidate candidates company e.g experience hiring i.e include includes including job join
+looking opportunity plus position preferred required requirements responsibilities role seeking strong team
+work working year years
+""".split())
+
+# Single-character terms that are real skills; other single characters are noise such as the k in 401(k)
+SINGLE_CHAR_TERMS = frozenset({"c", "r"})
+
+# Job description sentences are dropped when they match BOILERPLATE_RE (benefits, EEO and legal text)
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?;])\s+|\n")
+
+# BM25 term-frequency saturation
+BM25_K1 = 1.2
+
+
+class LocalScore(NamedTuple):
+    score: int
+    matched_terms: list
+    missing_terms: list
+
+
+def tokenize(text):
+    """Lowercase text and split it into content terms, dropping stopwords, bare numbers and stray letters"""
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS and not token.replace(".", "").isdigit()
+        and (len(token) > 1 or token in SINGLE_CHAR_TERMS)
+    ]
+
+
+def _saturate(term_frequencies):
+    return term_frequencies * (BM25_K1 + 1) / (term_frequencies + BM25_K1)
+
+
+def _job_vector(job_desc):
+    sentences = SENTENCE_SPLIT_RE.split(job_desc)
+    counts = Counter(tokenize("\n".join(sentence for sentence in sentences if not BOILERPLATE_RE.search(sentence))))
+    vocabulary = list(counts)
+    weights = _saturate(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+    return vocabulary, weights
+
+
+def _presence_matrix(resume_texts, vocabulary):
+    index = {term: position for position, term in enumerate(vocabulary)}
+    presence = np.zeros((len(resume_texts), len(vocabulary)), dtype=np.float64)
+    for row, text in enumerate(resume_texts):
+        columns = [index[token] for token in set(tokenize(text)) if token in index]
+        presence[row, columns] = 1.0
+    return presence
+
+
+def score_resume(resume_text, job_desc, top_n=15):
+    """Score how well a resume covers the job description's terms, without an LLM call.
+
+    The score is the BM25-weighted share of job description terms that appear
+    in the resume, from 0 to 100. Missing terms are ranked by weight.
+    """
+    vocabulary, weights = _job_vector(job_desc)
+    if not vocabulary:
+        return LocalScore(0, [], [])
+    present = _presence_matrix([resume_text], vocabulary)[0].astype(bool)
+    order = np.argsort(-weights, kind="stable")
+    score = int(round(100 * weights[present].sum() / weights.sum()))
+    matched = [vocabulary[i] for i in order if present[i]][:top_n]
+    missing = [vocabulary[i] for i in order if not present[i]][:top_n]
+    return LocalScore(score, matched, missing)
+
+
+def score_resumes(resume_texts, job_desc):
+    """Score many resumes against one job description in a single vectorized pass.
+
+    Returns an array of scores from 0 to 100, identical to score_resume for each resume.
+    """
+    vocabulary, weights = _job_vector(job_desc)
+    if not vocabulary or not resume_texts:
+        return np.zeros(len(resume_texts), dtype=np.int64)
+    presence = _presence_matrix(resume_texts, vocabulary)
+    return np.rint(100 * presence @ weights / weights.sum()).astype(np.int64)